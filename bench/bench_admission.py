@@ -0,0 +1,71 @@
+# Run a due date sweep for many users while users keep running /library, e.g.
+#   python -m bench.bench_admission --sweep-users 200 --interactive 50
+# Prints interactive latency and the library lane's queue/wait metrics.
+import json
+import time
+import asyncio
+import argparse
+from bench.stubs import StubConfig, StubServers, use_stub_servers
+from bench.fake_discord import FakeInteraction, load_commands, invoke
+from bot.tasks import due_date_check
+from bot.utils.admission import Priority, lanes
+from bot.utils.metrics import percentile
+
+
+async def run(args):
+    commands = await load_commands(["bot.commands.library"])
+    due_date_check.registered_users = {
+        f"user{i}": {
+            "username": f"SWEEP{i:04d}",
+            "password": f"SWEEP{i:04d}",
+            "user_id": str(i),
+        }
+        for i in range(args.sweep_users)
+    }
+
+    sweep = asyncio.create_task(due_date_check.fetch_all_books())
+    await asyncio.sleep(0.05)  # Let the sweep fill the queue first
+
+    latencies = []
+    max_depth = 0
+    for i in range(args.interactive):
+        interaction = FakeInteraction(user_id=10_000 + i)
+        start = time.perf_counter()
+        await invoke(commands["library"], interaction, username=f"LIB{i:04d}")
+        latencies.append((time.perf_counter() - start) * 1000)
+        max_depth = max(max_depth, lanes["library"].queued(Priority.BACKGROUND))
+        await asyncio.sleep(args.interval_ms / 1000)
+
+    sweep_start = time.perf_counter()
+    await sweep
+    return {
+        "interactive_ms": {
+            "p50": round(percentile(latencies, 50), 2),
+            "p99": round(percentile(latencies, 99), 2),
+        },
+        "max_background_queue_depth": max_depth,
+        "sweep_remaining_s": round(time.perf_counter() - sweep_start, 2),
+        "library_lane": lanes["library"].stats(),
+    }
+
+
+def main(args):
+    config = StubConfig(latency_ms=args.latency_ms, jitter_ms=args.latency_ms / 5)
+    with StubServers(config) as servers:
+        use_stub_servers(servers)
+        print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Measure interactive latency while a due date sweep runs."
+    )
+    parser.add_argument("--sweep-users", type=int, default=200)
+    parser.add_argument("--interactive", type=int, default=30)
+    parser.add_argument("--interval-ms", type=float, default=50)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,105 @@
+# Time formatting a course's items per request, uncached and from the formatted-item
+# cache, e.g.
+#   python -m bench.bench_formatting --items 500
+# Pass --fixture with a recorded announcements response to use real course data.
+import json
+import time
+import argparse
+from bench.stubs import make_course_items
+from bot.utils import classroom_api
+from bot.utils.models import ClassroomItem
+
+
+# Formatting as it was: an if/elif chain per material and repeated concatenation
+def legacy_format_item(item: ClassroomItem) -> str:
+    text = (
+        f"**Description**: {item.description if item.description else 'No description'}\n"
+        f"**Content**: {item.text if item.text else 'No content'}\n"
+        f"**Posted On**: {item.posted_date}"
+    )
+    materials_info = ""
+    for material in item.materials:
+        if "driveFile" in material:
+            drive_file = material["driveFile"]
+            title = drive_file.get("title", "Untitled")
+            file_id = drive_file.get("driveFile", {}).get("id", "Unknown ID")
+            drive_url = f"https://drive.google.com/file/d/{file_id}/view"
+            materials_info += f"📄 Drive File: {title} (URL: {drive_url})\n"
+        elif "youtubeVideo" in material:
+            youtube_video = material["youtubeVideo"]
+            title = youtube_video.get("title", "Untitled")
+            url = youtube_video.get("alternateLink", "Unknown URL")
+            materials_info += f"🎥 YouTube Video: {title} (URL: {url})\n"
+        elif "link" in material:
+            link = material["link"]
+            title = link.get("title", "Untitled")
+            url = link.get("url", "Unknown URL")
+            materials_info += f"🔗 Link: {title} (URL: {url})\n"
+        else:
+            materials_info += "📦 Unknown Material Type\n"
+    if materials_info:
+        text = f"{text}\n**Materials:**\n{materials_info.rstrip()}"
+    return text
+
+
+def load_items(args):
+    if args.fixture:
+        with open(args.fixture, "r") as f:
+            data = json.load(f)
+        announcements = data.get("announcements", [])
+        materials = data.get("courseWorkMaterial", [])
+    else:
+        announcements, materials = make_course_items("1000", args.items)
+    return [ClassroomItem.from_api("announcement", a) for a in announcements] + [
+        ClassroomItem.from_api("courseWorkMaterial", m) for m in materials
+    ]
+
+
+# Mean ms to format every item once; `reset` runs untimed before each request
+def time_per_request(format_item, items, repeat: int, reset=None) -> float:
+    elapsed = 0.0
+    for _ in range(repeat):
+        if reset:
+            reset()
+        start = time.perf_counter()
+        for item in items:
+            format_item(item)
+        elapsed += time.perf_counter() - start
+    return elapsed / repeat * 1000
+
+
+def main(args):
+    items = load_items(args)
+    assert all(
+        legacy_format_item(item) == classroom_api.format_item(item) for item in items
+    )
+
+    legacy_ms = time_per_request(legacy_format_item, items, args.repeat)
+
+    cold_ms = time_per_request(
+        classroom_api.format_item,
+        items,
+        args.repeat,
+        reset=classroom_api.formatted_items.clear,
+    )
+    # The last cold request left every item cached
+    warm_ms = time_per_request(classroom_api.format_item, items, args.repeat)
+
+    print(f"Formatting {len(items)} items per request, ms")
+    print(f"{'legacy (if/elif, +=)':<28}{legacy_ms:>10.3f}")
+    print(f"{'renderers, cache miss':<28}{cold_ms:>10.3f}")
+    print(f"{'renderers, cache hit':<28}{warm_ms:>10.3f}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare item formatting with and without the formatted-item cache."
+    )
+    parser.add_argument("--items", type=int, default=500, help="Items in the course")
+    parser.add_argument("--fixture", help="Recorded announcements/materials JSON")
+    parser.add_argument("--repeat", type=int, default=50)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    main(parse_args())
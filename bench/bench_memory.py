@@ -0,0 +1,206 @@
+# Measure RSS of the discord.py caches across simulated guild counts, e.g.
+#   python -m bench.bench_memory --guilds 100,1000,5000
+# Each (profile, guild count) runs in a fresh process fed synthetic gateway events.
+import sys
+import gc
+import json
+import asyncio
+import argparse
+import subprocess
+
+PROFILES = ["full", "lean"]
+
+_ids = iter(range(10**17, 10**18))
+
+
+def user_payload(index: int) -> dict:
+    return {
+        "id": str(next(_ids)),
+        "username": f"user{index}",
+        "discriminator": "0",
+        "global_name": f"User {index}",
+        "avatar": None,
+    }
+
+
+# A GUILD_CREATE payload; Discord sends emojis, stickers and voice members regardless
+# of intents, so the client's intents and cache flags decide what is kept
+def guild_payload(args) -> dict:
+    guild_id = str(next(_ids))
+    voice_channel_id = str(next(_ids))
+    members = [
+        {
+            "user": user_payload(i),
+            "roles": [],
+            "joined_at": "2025-01-01T00:00:00+00:00",
+            "flags": 0,
+        }
+        for i in range(args.members)
+    ]
+    return {
+        "id": guild_id,
+        "name": f"Guild {guild_id}",
+        "owner_id": members[0]["user"]["id"] if members else guild_id,
+        "member_count": args.members,
+        "roles": [
+            {"id": guild_id, "name": "@everyone", "permissions": "0", "position": 0}
+        ],
+        "channels": [
+            {"id": str(next(_ids)), "type": 0, "name": f"channel-{i}", "position": i}
+            for i in range(args.channels)
+        ]
+        + [
+            {
+                "id": voice_channel_id,
+                "type": 2,
+                "name": "voice",
+                "position": 0,
+                "bitrate": 64000,
+                "user_limit": 0,
+            }
+        ],
+        "emojis": [
+            {"id": str(next(_ids)), "name": f"emoji{i}", "animated": False}
+            for i in range(args.emojis)
+        ],
+        "stickers": [],
+        "members": members,
+        "voice_states": [
+            {
+                "user_id": member["user"]["id"],
+                "channel_id": voice_channel_id,
+                "session_id": "session",
+                "deaf": False,
+                "mute": False,
+                "self_deaf": False,
+                "self_mute": False,
+                "suppress": False,
+            }
+            for member in members[: args.members // 4]
+        ],
+    }
+
+
+def message_payload(guild: dict, index: int) -> dict:
+    text_channels = guild["channels"][:-1]
+    channel = text_channels[index % len(text_channels)]
+    return {
+        "id": str(next(_ids)),
+        "channel_id": channel["id"],
+        "guild_id": guild["id"],
+        "author": guild["members"][index % len(guild["members"])]["user"],
+        "content": f"message {index} " + "lorem ipsum " * 10,
+        "timestamp": "2025-01-01T00:00:00+00:00",
+        "edited_timestamp": None,
+        "tts": False,
+        "mention_everyone": False,
+        "mentions": [],
+        "mention_roles": [],
+        "attachments": [],
+        "embeds": [],
+        "pinned": False,
+        "type": 0,
+    }
+
+
+# Runs inside the child process
+async def child(args):
+    from discord.ext import commands
+    from bot.utils.memory import client_options, discord_cache_sizes, rss_bytes
+
+    bot = commands.Bot(command_prefix="$", **client_options(args.child))
+    await bot._async_setup_hook()  # What login() does first; events need the loop
+    state = bot._connection
+    gc.collect()
+    baseline = rss_bytes()
+
+    for _ in range(args.guild_count):
+        guild = guild_payload(args)
+        state._add_guild_from_data(guild)
+        # Message events only arrive with the guild messages intent
+        if bot.intents.guild_messages:
+            for index in range(args.messages):
+                state.parse_message_create(message_payload(guild, index))
+        await asyncio.sleep(0)
+
+    await asyncio.sleep(0.1)  # Let the dispatched on_message handlers finish
+    gc.collect()
+    rss = rss_bytes()
+    print(
+        json.dumps(
+            {
+                "rss_mb": round(rss / 2**20, 1),
+                "growth_mb": round((rss - baseline) / 2**20, 1),
+                "caches": discord_cache_sizes(bot),
+            }
+        )
+    )
+
+
+def run_child(profile: str, guild_count: int, args) -> dict:
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "bench.bench_memory",
+            "--child",
+            profile,
+            "--guild-count",
+            str(guild_count),
+            "--members",
+            str(args.members),
+            "--channels",
+            str(args.channels),
+            "--emojis",
+            str(args.emojis),
+            "--messages",
+            str(args.messages),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(args):
+    guild_counts = [int(count) for count in args.guilds.split(",")]
+    results = {
+        profile: {count: run_child(profile, count, args) for count in guild_counts}
+        for profile in PROFILES
+    }
+
+    print("RSS growth in MB over an empty client (total RSS in brackets)")
+    print(f"{'guilds':>8}" + "".join(f"{profile:>20}" for profile in PROFILES))
+    for count in guild_counts:
+        cells = "".join(
+            f"{results[profile][count]['growth_mb']:>10} ({results[profile][count]['rss_mb']:>6})"
+            for profile in PROFILES
+        )
+        print(f"{count:>8}{cells}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare discord.py cache memory of the runtime profiles."
+    )
+    parser.add_argument("--guilds", default="100,1000,5000", help="Comma separated")
+    parser.add_argument("--members", type=int, default=25, help="Per GUILD_CREATE")
+    parser.add_argument("--channels", type=int, default=10, help="Per guild")
+    parser.add_argument("--emojis", type=int, default=20, help="Per guild")
+    parser.add_argument("--messages", type=int, default=20, help="Per guild")
+    parser.add_argument("--output", help="Write the results as JSON")
+    parser.add_argument("--child", choices=PROFILES)
+    parser.add_argument("--guild-count", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.child:
+        asyncio.run(child(args))
+    else:
+        main(args)
@@ -0,0 +1,87 @@
+# Compare legacy dict rows with BookIssue models, e.g.
+#   python -m bench.bench_models --records 10000
+# Reports memory and due-date sweep CPU time per thousand records.
+import gc
+import time
+import argparse
+import tracemalloc
+from bench.stubs import make_books
+from bot.utils.models import BookIssue, select_due_soon
+
+
+# The sweep as it was: re-derive the due days from the display string on every pass
+def legacy_select_due_soon(rows_by_owner, within_days):
+    due = []
+    for owner, rows in rows_by_owner.items():
+        for row in rows:
+            try:
+                over_due_days = int(row["Over Due"].split()[0])
+            except (KeyError, ValueError, IndexError):
+                continue
+            if -within_days <= over_due_days <= 0:
+                due.append((owner, row))
+    return due
+
+
+def measure_memory(build):
+    gc.collect()
+    tracemalloc.start()
+    data = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return data, size
+
+
+def measure_cpu(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main(args):
+    users = max(1, args.records // args.books_per_user)
+    thousands = args.records / 1000
+
+    def build_rows():
+        return {
+            f"user{i}": make_books(f"user{i}", args.books_per_user)
+            for i in range(users)
+        }
+
+    rows, rows_size = measure_memory(build_rows)
+    # Built from fresh rows so the models do not share strings with `rows`
+    models, models_size = measure_memory(
+        lambda: {
+            owner: [BookIssue.from_row(row) for row in owner_rows]
+            for owner, owner_rows in build_rows().items()
+        }
+    )
+    legacy_cpu = measure_cpu(lambda: legacy_select_due_soon(rows, 3), args.repeat)
+    models_cpu = measure_cpu(lambda: select_due_soon(models, 3), args.repeat)
+    assert len(legacy_select_due_soon(rows, 3)) == len(select_due_soon(models, 3))
+
+    print(f"{args.records} records, {users} users")
+    print(f"{'':<12}{'KiB/1k records':>16}{'sweep ms/1k records':>22}")
+    print(
+        f"{'dict rows':<12}{rows_size / 1024 / thousands:>16.1f}"
+        f"{legacy_cpu * 1000 / thousands:>22.3f}"
+    )
+    print(
+        f"{'BookIssue':<12}{models_size / 1024 / thousands:>16.1f}"
+        f"{models_cpu * 1000 / thousands:>22.3f}"
+    )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare dict rows with BookIssue models."
+    )
+    parser.add_argument("--records", type=int, default=10000)
+    parser.add_argument("--books-per-user", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=50)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    main(parse_args())
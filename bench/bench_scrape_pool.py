@@ -0,0 +1,105 @@
+# Measure library sweep throughput and event loop lag with 0 (thread), 1, 2 and 4
+# scrape workers, e.g.
+#   python -m bench.bench_scrape_pool --users 200 --books 40
+# The stub servers run in a thread of this process, like the load test's.
+import os
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+from bench.stubs import StubConfig, StubServers, use_stub_servers
+from bot.utils.metrics import percentile
+
+
+# Sample how late the event loop wakes up while the sweep runs (heartbeat lag)
+async def measure_lag(lags, interval: float = 0.01):
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - start - interval) * 1000)
+
+
+async def sweep(workers: int, args) -> dict:
+    from bot.utils import scrape_pool
+    from bot.utils.admission import lanes
+
+    pool = scrape_pool.ScrapePool(
+        workers, args.tasks_per_worker, max(workers, 1) * args.in_flight_per_worker
+    )
+    scrape_pool.scrape_pool = pool
+    lanes["library"].limit = max(workers, 1) * args.in_flight_per_worker
+
+    # Warm the pool up so worker start-up is not counted
+    if workers:
+        await asyncio.gather(
+            *(scrape_pool.scrape_user_books("WARMUP", "WARMUP") for _ in range(workers))
+        )
+
+    lags = []
+    lag_task = asyncio.create_task(measure_lag(lags))
+    # Fresh usernames per run, so no run is served from the HTTP cache
+    usernames = [f"W{workers}U{i:05d}" for i in range(args.users)]
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(scrape_pool.scrape_user_books(username, username) for username in usernames)
+    )
+    elapsed = time.perf_counter() - start
+    lag_task.cancel()
+    pool.shutdown()
+
+    scraped = sum(1 for logged_in, books in results if logged_in and books)
+    return {
+        "scraped": scraped,
+        "elapsed_s": round(elapsed, 2),
+        "users_per_s": round(scraped / elapsed, 1),
+        "loop_lag_ms": {
+            "p50": round(percentile(lags, 50), 2),
+            "p99": round(percentile(lags, 99), 2),
+            "max": round(max(lags, default=0.0), 2),
+        },
+    }
+
+
+def main(args):
+    config = StubConfig(latency_ms=args.latency_ms, books_per_user=args.books)
+    with StubServers(config) as servers, tempfile.TemporaryDirectory() as state_dir:
+        os.environ["STATE_DIR"] = state_dir
+        os.environ["LOG_LEVEL"] = "WARNING"
+        use_stub_servers(servers)
+        results = {
+            workers: asyncio.run(sweep(workers, args))
+            for workers in (int(count) for count in args.workers.split(","))
+        }
+
+    print(f"Sweep of {args.users} users with {args.books} books each")
+    print(f"{'workers':>8}{'users/s':>10}{'lag p50':>10}{'lag p99':>10}{'lag max':>10}")
+    for workers, result in results.items():
+        lag = result["loop_lag_ms"]
+        print(
+            f"{workers or 'thread':>8}{result['users_per_s']:>10}"
+            f"{lag['p50']:>10}{lag['p99']:>10}{lag['max']:>10}"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare library sweep throughput across scrape pool sizes."
+    )
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--books", type=int, default=40, help="Per user")
+    parser.add_argument("--latency-ms", type=float, default=5)
+    parser.add_argument(
+        "--workers", default="0,1,2,4", help="Comma separated, 0 scrapes in a thread"
+    )
+    parser.add_argument("--tasks-per-worker", type=int, default=200)
+    parser.add_argument("--in-flight-per-worker", type=int, default=2)
+    parser.add_argument("--output", help="Write the results as JSON")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    main(parse_args())
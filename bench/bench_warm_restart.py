@@ -0,0 +1,90 @@
+# Measure first-command latency after a restart, with and without the cache snapshot:
+#   python -m bench.bench_warm_restart --latency-ms 150
+# Each phase runs in a fresh process against the same stub servers.
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from bench.stubs import StubConfig, StubServers
+from bot.utils.snapshot import SNAPSHOT_FILE
+
+COMMANDS = [
+    ("library", {"username": "WARM0001"}),
+    ("classrooms", {}),
+    ("classroom_announcements", {"course_id": "1000"}),
+]
+
+
+# Runs inside the child process
+async def child(phase: str):
+    from bench.fake_discord import FakeInteraction, load_commands, invoke
+    from bench.load import EXTENSIONS
+    from bot.utils.snapshot import load_snapshot, save_snapshot
+
+    if phase == "warm":
+        load_snapshot()
+    commands = await load_commands(EXTENSIONS)
+
+    latencies = {}
+    for name, options in COMMANDS:
+        start = time.perf_counter()
+        await invoke(commands[name], FakeInteraction(user_id=1), **options)
+        latencies[name] = round((time.perf_counter() - start) * 1000, 1)
+
+    if phase == "prime":
+        save_snapshot()
+    print(json.dumps(latencies))
+
+
+def run_phase(phase: str, env: dict) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-m", "bench.bench_warm_restart", "--child", phase],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(args):
+    config = StubConfig(latency_ms=args.latency_ms)
+    with StubServers(config) as servers, tempfile.TemporaryDirectory() as state_dir:
+        env = dict(
+            os.environ,
+            STATE_DIR=state_dir,
+            LOG_LEVEL="WARNING",
+            LIBRARY_URL=servers.urls["library"],
+            CLASSROOM_API_ENDPOINT=servers.urls["classroom"],
+            BACKENDURL=servers.urls["backend"],
+        )
+        results = {"prime": run_phase("prime", env)}
+        results["warm"] = run_phase("warm", env)
+        os.remove(os.path.join(state_dir, SNAPSHOT_FILE))
+        results["cold"] = run_phase("cold", env)
+
+    print(f"First-command latency in ms (upstream latency {args.latency_ms} ms)")
+    print(f"{'command':<26}{'cold':>10}{'warm':>10}")
+    for name, _ in COMMANDS:
+        print(f"{name:<26}{results['cold'][name]:>10}{results['warm'][name]:>10}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare first-command latency with and without a snapshot."
+    )
+    parser.add_argument("--latency-ms", type=float, default=150)
+    parser.add_argument("--child", choices=["prime", "warm", "cold"])
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.child:
+        asyncio.run(child(args.child))
+    else:
+        main(args)
@@ -0,0 +1,87 @@
+import itertools
+import discord
+from discord.ext import commands
+
+_message_ids = itertools.count(1)
+
+
+class FakeUser:
+    def __init__(self, user_id: int, name: str):
+        self.id = user_id
+        self.name = name
+
+
+# Stands in for discord.Message; keeps what the command sent
+class FakeMessage:
+    def __init__(self, content=None, embed=None, view=None, **kwargs):
+        self.id = next(_message_ids)
+        self.content = content
+        self.embed = embed
+        self.view = view
+        self.kwargs = kwargs
+
+    @property
+    def text(self) -> str:
+        if self.embed is not None:
+            return f"{self.embed.title}\n{self.embed.description}"
+        return self.content or ""
+
+    async def edit(self, **kwargs):
+        self.kwargs.update(kwargs)
+
+
+class FakeResponse:
+    def __init__(self, interaction):
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def defer(self, **kwargs):
+        self._done = True
+
+    async def send_message(self, content=None, **kwargs):
+        self._done = True
+        self._interaction.messages.append(FakeMessage(content, **kwargs))
+
+    async def edit_message(self, **kwargs):
+        self._done = True
+        await self._interaction.messages[-1].edit(**kwargs)
+
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self._interaction = interaction
+
+    async def send(self, content=None, wait=False, **kwargs):
+        message = FakeMessage(content, **kwargs)
+        self._interaction.messages.append(message)
+        return message
+
+
+# Minimal discord.Interaction replacement for invoking cog commands directly
+class FakeInteraction:
+    def __init__(self, user_id: int = 1, name: str = "tester"):
+        self.user = FakeUser(user_id, name)
+        self.created_at = discord.utils.utcnow()
+        self.messages = []
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+
+    async def original_response(self):
+        return self.messages[0] if self.messages else None
+
+
+# Load the extensions into a bot that never connects and index their slash commands
+async def load_commands(extensions) -> dict:
+    bot = commands.Bot(command_prefix="$", intents=discord.Intents.default())
+    for extension in extensions:
+        await bot.load_extension(extension)
+    return {command.name: command for command in bot.tree.get_commands()}
+
+
+# Run a slash command's callback the way the command tree would
+async def invoke(command, interaction, **options):
+    await command.callback(command.binding, interaction, **options)
+    return interaction.messages
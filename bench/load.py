@@ -0,0 +1,159 @@
+# Load test the slash commands against local stub servers, e.g.
+#   python -m bench.load --requests 200 --concurrency 20 --latency-ms 50
+# Per-command throughput and p50/p95/p99 latency are written to --output as JSON.
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from bench.stubs import StubConfig, StubServers, use_stub_servers
+from bench.fake_discord import FakeInteraction, load_commands, invoke
+from bot.utils.metrics import percentile
+from bot.utils.token_backend import token_backend
+
+EXTENSIONS = [
+    "bot.commands.greet",
+    "bot.commands.library",
+    "bot.commands.classroom",
+    "bot.commands.dashboard",
+]
+
+
+# Command name -> function building its options for a given (fake) user
+def default_scenarios():
+    return {
+        "greet": lambda user: {},
+        "library": lambda user: {"username": f"LIB{user:04d}"},
+        "classrooms": lambda user: {},
+        "classroom_announcements": lambda user: {"course_id": "1000"},
+        "dashboard": lambda user: {},
+    }
+
+
+# Commands report upstream failures as a reply instead of raising
+def is_failure(messages) -> bool:
+    return not messages or any(
+        message.text.startswith("Failed") for message in messages
+    )
+
+
+def summarize(latencies, errors, elapsed):
+    return {
+        "count": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(latencies), 2) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+# Fire `requests` command invocations per command with bounded concurrency
+async def run_load(commands, scenarios, requests: int, concurrency: int, users: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    results = {
+        name: {"latencies": [], "errors": 0, "first_start": None, "last_end": None}
+        for name in scenarios
+    }
+
+    async def one(name, user):
+        async with semaphore:
+            interaction = FakeInteraction(user_id=user, name=f"user{user}")
+            start = time.perf_counter()
+            if results[name]["first_start"] is None:
+                results[name]["first_start"] = start
+            try:
+                messages = await invoke(
+                    commands[name], interaction, **scenarios[name](user)
+                )
+                if is_failure(messages):
+                    results[name]["errors"] += 1
+            except Exception:
+                results[name]["errors"] += 1
+            end = time.perf_counter()
+            results[name]["latencies"].append((end - start) * 1000)
+            results[name]["last_end"] = end
+
+    jobs = [
+        one(name, random.randrange(users))
+        for name in scenarios
+        for _ in range(requests)
+    ]
+    random.shuffle(jobs)
+    start = time.perf_counter()
+    await asyncio.gather(*jobs)
+    elapsed = time.perf_counter() - start
+
+    # Commands run interleaved, so each one's throughput is over its own active span
+    report = {
+        name: summarize(
+            data["latencies"],
+            data["errors"],
+            (data["last_end"] - data["first_start"]) if data["latencies"] else 0.0,
+        )
+        for name, data in results.items()
+    }
+    all_latencies = [ms for data in results.values() for ms in data["latencies"]]
+    report["_total"] = summarize(
+        all_latencies, sum(data["errors"] for data in results.values()), elapsed
+    )
+    return report
+
+
+async def main(args):
+    config = StubConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        books_per_user=args.books,
+        items_per_course=args.items,
+    )
+    scenarios = default_scenarios()
+    if args.commands:
+        scenarios = {name: scenarios[name] for name in args.commands.split(",")}
+
+    with StubServers(config) as servers:
+        use_stub_servers(servers)
+        commands = await load_commands(EXTENSIONS)
+        try:
+            report = await run_load(
+                commands, scenarios, args.requests, args.concurrency, args.users
+            )
+        finally:
+            await token_backend.close()
+
+    result = {
+        "timestamp": time.time(),
+        "python": sys.version.split()[0],
+        "config": vars(args),
+        "commands": report,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Load test the bot's slash commands against local stub servers."
+    )
+    parser.add_argument("--commands", help="Comma separated command names")
+    parser.add_argument("--requests", type=int, default=50, help="Per command")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--books", type=int, default=5, help="Books per user")
+    parser.add_argument("--items", type=int, default=20, help="Items per course")
+    parser.add_argument("--output", default="bench_results.json")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,279 @@
+import os
+import json
+import random
+import hashlib
+import asyncio
+import threading
+import datetime
+from dataclasses import dataclass
+from aiohttp import web
+
+# Token returned by the fake backend; valid until far in the future
+FAKE_TOKEN = {
+    "token": "stub-access-token",
+    "refresh_token": "stub-refresh-token",
+    "client_id": "stub-client-id",
+    "client_secret": "stub-client-secret",
+    "expiry": "2099-01-01T00:00:00Z",
+}
+
+
+# Latency and failure behaviour of a stub server
+@dataclass
+class StubConfig:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    books_per_user: int = 5
+    courses_per_user: int = 3
+    items_per_course: int = 20
+    # Send ETags and answer If-None-Match with 304
+    etags: bool = True
+
+
+# Simulate network latency and random upstream failures
+def _latency_middleware(config: StubConfig):
+    @web.middleware
+    async def middleware(request, handler):
+        delay = config.latency_ms + random.uniform(0, config.jitter_ms)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+        if config.error_rate and random.random() < config.error_rate:
+            return web.json_response({"error": "Injected failure"}, status=503)
+        return await handler(request)
+
+    return middleware
+
+
+# Reply with the body, or 304 if the client already has this version
+def _conditional_response(request, config: StubConfig, body: str, content_type):
+    if not config.etags:
+        return web.Response(text=body, content_type=content_type)
+    etag = '"' + hashlib.sha1(body.encode()).hexdigest() + '"'
+    if request.headers.get("If-None-Match") == etag:
+        return web.Response(status=304, headers={"ETag": etag})
+    return web.Response(text=body, content_type=content_type, headers={"ETag": etag})
+
+
+# Books issued to a (fake) library user
+def make_books(username: str, count: int, today=None):
+    today = today or datetime.date.today()
+    books = []
+    for i in range(count):
+        issue_date = today - datetime.timedelta(days=14 + i)
+        return_date = issue_date + datetime.timedelta(days=15)
+        books.append(
+            {
+                "Accession No.": f"{username}-{i:04d}",
+                "Title": f"Book {i} of {username}",
+                "Issue Date": issue_date.isoformat(),
+                "Return Date": return_date.isoformat(),
+                "Over Due": f"{(today - return_date).days} Days",
+            }
+        )
+    return books
+
+
+# Render books as the e-library's BookIssue page
+def render_book_issue_page(books) -> str:
+    headers = ["Accession No.", "Title", "Issue Date", "Return Date", "Over Due"]
+    head = "".join(f"<th>{header}</th>" for header in headers)
+    rows = "".join(
+        "<tr>" + "".join(f"<td>{book[header]}</td>" for header in headers) + "</tr>"
+        for book in books
+    )
+    return (
+        "<html><body><h2>Book Issue</h2>"
+        '<table class="table table-striped">'
+        f"<thead><tr>{head}</tr></thead><tbody>{rows}</tbody>"
+        "</table></body></html>"
+    )
+
+
+# Fake e-library: /Account/Login and /Book/BookIssue
+def library_app(config: StubConfig) -> web.Application:
+    sessions = {}
+
+    async def login(request):
+        form = await request.post()
+        username = form.get("Username")
+        if not username or form.get("Password") != username:
+            return web.Response(text="Invalid login", status=401)
+        session_id = f"session-{username}"
+        sessions[session_id] = username
+        response = web.Response(text="Welcome")
+        response.set_cookie("ASP.NET_SessionId", session_id)
+        return response
+
+    async def book_issue(request):
+        username = sessions.get(request.cookies.get("ASP.NET_SessionId"))
+        if username is None:
+            return web.Response(text="<html>Login required</html>", status=302)
+        books = make_books(username, config.books_per_user)
+        return _conditional_response(
+            request, config, render_book_issue_page(books), "text/html"
+        )
+
+    app = web.Application(middlewares=[_latency_middleware(config)])
+    app.router.add_post("/Account/Login", login)
+    app.router.add_get("/Book/BookIssue", book_issue)
+    return app
+
+
+# Announcements and coursework materials of a (fake) course
+def make_course_items(course_id: str, count: int):
+    start = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+    announcements, materials = [], []
+    for i in range(count):
+        created = (
+            (start + datetime.timedelta(hours=i)).isoformat().replace("+00:00", "Z")
+        )
+        attachments = [
+            {"link": {"title": f"Slides {i}", "url": f"https://example.com/{i}"}},
+            {
+                "driveFile": {
+                    "title": f"Notes {i}.pdf",
+                    "driveFile": {"id": f"file-{course_id}-{i}"},
+                }
+            },
+        ]
+        item = {
+            "id": f"{course_id}-{i}",
+            "courseId": course_id,
+            "creationTime": created,
+            "updateTime": created,
+            "materials": attachments,
+        }
+        if i % 2:
+            materials.append({**item, "title": f"Material {i}", "description": ""})
+        else:
+            announcements.append({**item, "text": f"Announcement {i} for {course_id}"})
+    return announcements, materials
+
+
+# Fake Google Classroom REST API (the subset the bot uses)
+def classroom_app(config: StubConfig) -> web.Application:
+    def course_ids():
+        return [str(1000 + i) for i in range(config.courses_per_user)]
+
+    def page(request, items, key):
+        page_size = int(request.query.get("pageSize", len(items)) or len(items))
+        body = json.dumps({key: items[::-1][:page_size]})
+        return _conditional_response(request, config, body, "application/json")
+
+    async def courses(request):
+        courses = [
+            {"id": course_id, "name": f"Course {course_id}"}
+            for course_id in course_ids()
+        ]
+        return page(request, courses[::-1], "courses")
+
+    async def announcements(request):
+        course_id = request.match_info["course_id"]
+        items, _ = make_course_items(course_id, config.items_per_course)
+        return page(request, items, "announcements")
+
+    async def course_work_materials(request):
+        course_id = request.match_info["course_id"]
+        _, items = make_course_items(course_id, config.items_per_course)
+        return page(request, items, "courseWorkMaterial")
+
+    app = web.Application(middlewares=[_latency_middleware(config)])
+    app.router.add_get("/v1/courses", courses)
+    app.router.add_get("/v1/courses/{course_id}/announcements", announcements)
+    app.router.add_get(
+        "/v1/courses/{course_id}/courseWorkMaterials", course_work_materials
+    )
+    return app
+
+
+# Fake token backend: /classroom/check/ and /classroom/unsubscribe
+def backend_app(config: StubConfig, unauthorized=()) -> web.Application:
+    revoked = set(unauthorized)
+
+    async def check(request):
+        client_id = request.query.get("clientid")
+        if client_id in revoked:
+            return web.json_response({"error": "Token not found"})
+        return web.json_response({"token": json.dumps(FAKE_TOKEN)})
+
+    async def check_bulk(request):
+        client_ids = (await request.json()).get("clientids", [])
+        tokens = {
+            client_id: json.dumps(FAKE_TOKEN)
+            for client_id in client_ids
+            if client_id not in revoked
+        }
+        return web.json_response({"tokens": tokens})
+
+    async def unsubscribe(request):
+        client_id = request.query.get("clientid")
+        if client_id in revoked:
+            return web.json_response({"error": "Token not found"}, status=404)
+        revoked.add(client_id)
+        return web.json_response({"message": "Unsubscribed"})
+
+    app = web.Application(middlewares=[_latency_middleware(config)])
+    app.router.add_get("/classroom/check/", check)
+    app.router.add_post("/classroom/check/bulk", check_bulk)
+    app.router.add_delete("/classroom/unsubscribe", unsubscribe)
+    return app
+
+
+# Runs the three stub servers on their own event loop in a background thread
+class StubServers:
+    def __init__(self, config: StubConfig = None, host: str = "127.0.0.1"):
+        self.config = config or StubConfig()
+        self.host = host
+        self.urls = {}
+        self._loop = asyncio.new_event_loop()
+        self._runners = []
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    async def _start_app(self, name, app):
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, self.host, 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self._runners.append(runner)
+        self.urls[name] = f"http://{self.host}:{port}"
+
+    async def _start(self):
+        await self._start_app("library", library_app(self.config))
+        await self._start_app("classroom", classroom_app(self.config))
+        await self._start_app("backend", backend_app(self.config))
+
+    async def _stop(self):
+        for runner in self._runners:
+            await runner.cleanup()
+
+    def start(self):
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+        return self
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# Point the bot's upstream clients at the stub servers
+def use_stub_servers(servers: StubServers):
+    from bot.utils import classroom_api, google_auth, library_api, token_backend
+
+    # Also through the environment, for worker processes spawned later
+    os.environ["LIBRARY_URL"] = servers.urls["library"]
+    os.environ["CLASSROOM_API_ENDPOINT"] = servers.urls["classroom"]
+    os.environ["BACKENDURL"] = servers.urls["backend"]
+    library_api.LIBRARY_URL = servers.urls["library"]
+    classroom_api.CLASSROOM_API_ENDPOINT = servers.urls["classroom"]
+    google_auth.BACKEND_URL = servers.urls["backend"]
+    token_backend.BACKEND_URL = servers.urls["backend"]
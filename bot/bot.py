@@ -1,36 +1,125 @@
+import asyncio
+import logging
 import discord
-from discord.ext import commands
-from bot.tasks.due_date_check import check_due_dates
+from discord import app_commands
+from discord.ext import tasks
+from bot.tasks import due_date_check, dashboard_refresh  # Register the jobs
+from bot.tasks.scheduler import scheduler
+from bot.utils.admission import admission_stats
+from bot.utils.command_sync import sync_commands
+from bot.utils.http_cache import http_cache_stats
 from bot.utils.logging_setup import setup_logging
+from bot.utils.memory import client_options, memory_report, watch_client
+from bot.utils.scrape_pool import scrape_pool_stats
+from bot.utils.sharding import PROCESS_INDEX, create_bot, write_health
+from bot.utils.snapshot import save_snapshot, SNAPSHOT_INTERVAL_MINUTES
 
-# Enable the message content intent
-intents = discord.Intents.default()
-intents.message_content = True
-
-# Initialize the bot with a command prefix
-bot = commands.Bot(command_prefix="$", intents=intents)
+# Initialize the bot with the intents and caches of the runtime profile
+# (sharded when run by the supervisor)
+bot = create_bot(command_prefix="$", **client_options())
+watch_client(bot)
 
 # Set up logging
 setup_logging()
+logger = logging.getLogger(__name__)
 
 
 # Event: When the bot is ready
 @bot.event
 async def on_ready():
-    print(f"Logged on as {bot.user}!")
-    # Sync slash commands with Discord
+    logger.info("Logged on as %s!", bot.user)
+    # Sync slash commands with Discord (only when the command tree changed). The
+    # command tree is global, so only the first shard process syncs it
+    if PROCESS_INDEX == 0:
+        try:
+            await sync_commands(bot)
+        except Exception as e:
+            logger.error("Failed to sync commands: %s", e)
+
+    # Start the background tasks (on_ready fires again on every reconnect)
+    if not scheduler.is_running():
+        scheduler.start(bot)
+    if not report_health.is_running():
+        report_health.start()
+    if not snapshot_caches.is_running():
+        snapshot_caches.start()
+
+
+# Metrics published with the health report, served by the supervisor's /metrics/*
+def process_metrics() -> dict:
+    return {
+        "admission": admission_stats(),
+        "scrape_pool": scrape_pool_stats(),
+        "http_cache": http_cache_stats(),
+        "memory": memory_report(limit=0),
+    }
+
+
+# Report per-shard health for the supervisor and /health/shards
+@tasks.loop(seconds=15)
+async def report_health():
+    try:
+        write_health(bot, metrics=process_metrics())
+    except OSError as e:
+        logger.error("Failed to write health report: %s", e)
+
+
+# Periodically snapshot the caches so a crash loses little warm state
+@tasks.loop(minutes=SNAPSHOT_INTERVAL_MINUTES)
+async def snapshot_caches():
     try:
-        synced = await bot.tree.sync()
-        print(f"Synced {len(synced)} command(s).")
+        await asyncio.to_thread(save_snapshot)
     except Exception as e:
-        print(f"Failed to sync commands: {e}")
+        logger.error("Failed to save snapshot: %s", e)
+
+
+# Event: Log every completed slash command with its latency
+@bot.event
+async def on_app_command_completion(interaction: discord.Interaction, command):
+    latency_ms = (
+        discord.utils.utcnow() - interaction.created_at
+    ).total_seconds() * 1000
+    logger.info(
+        "Command %s completed in %.0f ms",
+        command.qualified_name,
+        latency_ms,
+        extra={
+            "command": command.qualified_name,
+            "user_id": interaction.user.id,
+            "latency_ms": round(latency_ms, 1),
+        },
+    )
+
+
+# Tell users when they hit a command cooldown instead of failing silently
+@bot.tree.error
+async def on_app_command_error(
+    interaction: discord.Interaction, error: app_commands.AppCommandError
+):
+    if isinstance(error, app_commands.CommandOnCooldown):
+        message = f"Slow down! Try again in {error.retry_after:.0f}s."
+    else:
+        logger.error(
+            "Command %s failed: %s", interaction.command, error, exc_info=error
+        )
+        message = "Something went wrong. Please try again later."
+
+    if interaction.response.is_done():
+        await interaction.followup.send(message, ephemeral=True)
+    else:
+        await interaction.response.send_message(message, ephemeral=True)
+
 
-    # Start the background task
-    check_due_dates.start(bot)
+# Extensions (cogs) loaded at startup
+EXTENSIONS = [
+    "bot.commands.greet",
+    "bot.commands.library",
+    "bot.commands.classroom",
+    "bot.commands.dashboard",
+]
 
 
 # Function to load extensions
 async def load_extensions():
-    await bot.load_extension("bot.commands.greet")
-    await bot.load_extension("bot.commands.library")
-    await bot.load_extension("bot.commands.classroom")
+    for extension in EXTENSIONS:
+        await bot.load_extension(extension)
@@ -2,7 +2,40 @@ from discord.ext import commands
 from discord import app_commands
 import discord
 from bot.utils.google_auth import get_credentials, delete_token
-from bot.utils.classroom_api import list_classrooms, list_announcements
+from bot.utils.classroom_api import (
+    list_classrooms,
+    list_announcements,
+    format_item,
+    forget_classroom_user,
+)
+from bot.utils.rendering import send_paginated, truncate
+from bot.utils.admission import run_upstream, user_cooldown
+from bot.utils.search_index import get_search_index
+from bot.utils.dashboard import (
+    AUTHORIZED,
+    NOT_AUTHORIZED,
+    update_auth,
+    update_courses,
+    update_announcements,
+)
+
+
+# Format a numbered announcement or coursework material for display
+def format_announcement(numbered_item) -> str:
+    index, item = numbered_item
+    return f"**Title**: {item.kind.capitalize()} {index}\n{format_item(item)}"
+
+
+# Format a search hit from the local index
+def format_search_result(result) -> str:
+    kind = "Announcement" if result["kind"] == "announcement" else "Material"
+    text = (
+        f"**{kind}** in course {result['course_id']} ({result['posted_date']})\n"
+        f"{result['snippet']}"
+    )
+    if result["link"]:
+        text = f"{text}\n{result['link']}"
+    return text
 
 
 class ClassroomCog(commands.Cog):
@@ -13,21 +46,24 @@ class ClassroomCog(commands.Cog):
     @app_commands.command(
         name="login", description="Authorize access to Google Classroom"
     )
+    @user_cooldown()
     async def login(self, interaction: discord.Interaction):
         client_id = str(interaction.user.id)
 
         try:
             await interaction.response.defer()  # To avoid interaction timeout
-            data = get_credentials(client_id)
+            data = await get_credentials(client_id)
 
             # Check if the response contains an auth_url
             if isinstance(data, dict) and "auth_url" in data:
+                await update_auth(client_id, NOT_AUTHORIZED)
                 await interaction.followup.send(
                     f"Please authorize the app by visiting this link: {data['auth_url']}"
                 )
             elif isinstance(data, dict) and "error" in data:
                 await interaction.followup.send(data["error"])
             else:
+                await update_auth(client_id, AUTHORIZED)
                 await interaction.followup.send(
                     "Already authorized Google Classroom access!"
                 )
@@ -39,17 +75,21 @@ class ClassroomCog(commands.Cog):
     @app_commands.command(
         name="logout", description="Revoke access to Google Classroom"
     )
+    @user_cooldown()
     async def logout(self, interaction: discord.Interaction):
         client_id = str(interaction.user.id)
 
         try:
             await interaction.response.defer()  # To avoid interaction timeout
-            res = delete_token(client_id)
+            res = await delete_token(client_id)
 
             # Check if the response contains an error
             if isinstance(res, dict) and "error" in res:
                 await interaction.followup.send(res["error"])
             else:
+                # Forget the user's cached courses and indexed items
+                forget_classroom_user(client_id)
+                await update_auth(client_id, NOT_AUTHORIZED)
                 await interaction.followup.send(
                     "Successfully revoked Google Classroom access."
                 )
@@ -61,29 +101,28 @@ class ClassroomCog(commands.Cog):
     @app_commands.command(
         name="classrooms", description="Get the list of your Google Classrooms"
     )
+    @user_cooldown()
     async def classrooms(self, interaction: discord.Interaction):
         client_id = str(interaction.user.id)
 
         try:
             await interaction.response.defer()  # To avoid interaction timeout
-            courses = list_classrooms(client_id)
+            creds = await get_credentials(client_id)
+            courses = await run_upstream("google", list_classrooms, client_id, creds)
 
             # Check if the user needs to authorize first
             if isinstance(courses, dict) and "error" in courses:
                 await interaction.followup.send(courses["error"])
                 return
 
-            # Check if no classrooms were found
-            if not courses:
-                await interaction.followup.send("No classrooms found.")
-                return
-
-            # Format the list of classrooms
-            classrooms_list = "\n".join(
-                [f"- {course['name']} (ID: {course['id']})" for course in courses]
-            )
-            await interaction.followup.send(
-                f"Your Google Classrooms:\n{classrooms_list}"
+            await update_courses(client_id, courses)
+            await send_paginated(
+                interaction,
+                courses,
+                lambda course: f"- {course['name']} (ID: {course['id']})",
+                title="Your Google Classrooms",
+                empty_message="No classrooms found.",
+                separator="\n",
             )
 
         except Exception as e:
@@ -95,6 +134,7 @@ class ClassroomCog(commands.Cog):
         description="Get the top 3 announcements for a specific Google Classroom",
     )
     @app_commands.describe(course_id="The ID of the Google Classroom course")
+    @user_cooldown()
     async def classroom_announcements(
         self, interaction: discord.Interaction, course_id: str
     ):
@@ -102,33 +142,23 @@ class ClassroomCog(commands.Cog):
 
         try:
             await interaction.response.defer()  # Defer the response to avoid timeout
-            announcements = list_announcements(course_id, client_id)
+            creds = await get_credentials(client_id)
+            announcements = await run_upstream(
+                "google", list_announcements, course_id, client_id, creds
+            )
 
             # Check if the response contains an error
             if isinstance(announcements, dict) and "error" in announcements:
                 await interaction.followup.send(announcements["error"])
                 return
 
-            # Check if no announcements were found
-            if not announcements:
-                await interaction.followup.send(
-                    f"No announcements found for course {course_id}."
-                )
-                return
-
-            # Format the list of announcements
-            announcements_list = "\n\n".join(
-                [
-                    f"**Title**: {ann['title']}\n"
-                    f"**Description**:{ann['description'] if ann['description'] else 'No description'}\n"
-                    f"**Content**: {ann['content'] if ann['content'] else 'No content'}\n"
-                    f"**Posted On**: {ann['posted_date']}\n"
-                    for ann in announcements
-                ]
-            )
-
-            await interaction.followup.send(
-                f"Top 3 Announcements for Course {course_id}:\n{announcements_list}"
+            await update_announcements(client_id, course_id, announcements)
+            await send_paginated(
+                interaction,
+                enumerate(announcements, start=1),
+                format_announcement,
+                title=f"Top 3 Announcements for Course {course_id}",
+                empty_message=f"No announcements found for course {course_id}.",
             )
 
         except Exception as e:
@@ -136,6 +166,33 @@ class ClassroomCog(commands.Cog):
                 "Failed to fetch announcements. Please try again later."
             )
 
+    # Search the announcements and materials fetched so far, without calling Google
+    @app_commands.command(
+        name="classroom_search",
+        description="Search your Google Classroom announcements and materials",
+    )
+    @app_commands.describe(query="Words to look for")
+    async def classroom_search(self, interaction: discord.Interaction, query: str):
+        client_id = str(interaction.user.id)
+        shown_query = truncate(query, 100)
+
+        try:
+            results = get_search_index().search(client_id, query)
+            await send_paginated(
+                interaction,
+                results,
+                format_search_result,
+                title=f"Results for “{shown_query}”",
+                empty_message=f"No announcements or materials match “{shown_query}”.",
+            )
+
+        except Exception as e:
+            # Sending the first page may have answered the interaction already
+            if interaction.response.is_done():
+                await interaction.followup.send(f"Failed to search: {e}")
+            else:
+                await interaction.response.send_message(f"Failed to search: {e}")
+
 
 async def setup(bot):
     await bot.add_cog(ClassroomCog(bot))
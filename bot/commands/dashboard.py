@@ -0,0 +1,117 @@
+import datetime
+import discord
+from discord import app_commands
+from discord.ext import commands
+from bot.utils.admission import user_cooldown
+from bot.utils.dashboard import AUTHORIZED, get_view, mark_viewed
+from bot.utils.rendering import truncate
+
+# Books and announcements listed on the dashboard
+DASHBOARD_ROWS = 5
+
+_OLDEST = datetime.datetime.min.replace(tzinfo=datetime.timezone.utc)
+
+
+# Discord relative timestamp ("3 minutes ago") for when a section was last refreshed
+def format_updated(timestamp) -> str:
+    if not timestamp:
+        return "never"
+    return f"<t:{int(timestamp)}:R>"
+
+
+def format_books_due(view, today) -> str:
+    books = view["books"]
+    if books is None:
+        return "Run `/library` to load your issued books."
+    if not books:
+        return "No books issued."
+
+    books = sorted(
+        books,
+        key=lambda book: (
+            (book.return_date - today).days if book.return_date else float("inf")
+        ),
+    )
+    lines = []
+    for book in books[:DASHBOARD_ROWS]:
+        if book.return_date:
+            days = (book.return_date - today).days
+            due = f"overdue by {-days} day(s)" if days < 0 else f"due in {days} day(s)"
+        else:
+            due = "due date unknown"
+        lines.append(f"**{truncate(book.title, 80)}**: {due}")
+    lines.append(f"Updated {format_updated(view['books_updated_at'])}")
+    return "\n".join(lines)
+
+
+def format_latest_announcements(view) -> str:
+    if view["auth_status"] != AUTHORIZED:
+        return "Not connected. Run `/login` to link Google Classroom."
+
+    items = [
+        (course["name"], item)
+        for course in view["courses"].values()
+        for item in course["items"]
+    ]
+    if not items:
+        return "Run `/classroom_announcements` to load announcements."
+
+    items.sort(key=lambda pair: pair[1].update_time or _OLDEST, reverse=True)
+    lines = [
+        f"**{course_name}** ({item.posted_date}): {truncate(item.text or 'No content', 80)}"
+        for course_name, item in items[:DASHBOARD_ROWS]
+    ]
+    updated = max(
+        (course["updated_at"] or 0 for course in view["courses"].values()), default=0
+    )
+    lines.append(f"Updated {format_updated(updated)}")
+    return "\n".join(lines)
+
+
+def build_dashboard_embed(user, view) -> discord.Embed:
+    today = datetime.date.today()
+    embed = discord.Embed(title=f"{user.name}'s dashboard", color=discord.Color.blue())
+    embed.add_field(name="Books due", value=format_books_due(view, today), inline=False)
+    embed.add_field(
+        name="Latest announcements",
+        value=format_latest_announcements(view),
+        inline=False,
+    )
+    auth_status = view["auth_status"] or "unknown"
+    embed.add_field(
+        name="Google Classroom",
+        value=f"{auth_status.capitalize()} (checked {format_updated(view['auth_updated_at'])})",
+        inline=False,
+    )
+    return embed
+
+
+class DashboardCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    # Slash command to show the user's dashboard (served from memory, no upstream calls)
+    @app_commands.command(
+        name="dashboard",
+        description="Show your books due and latest classroom announcements",
+    )
+    @user_cooldown()
+    async def dashboard(self, interaction: discord.Interaction):
+        view = await get_view(interaction.user.id)
+        if view is None:
+            await interaction.response.send_message(
+                "Your dashboard is empty. Use `/library` or `/classrooms` first.",
+                ephemeral=True,
+            )
+            return
+
+        # Keep the dashboard in the background refresh set
+        await mark_viewed(interaction.user.id)
+        await interaction.response.send_message(
+            embed=build_dashboard_embed(interaction.user, view)
+        )
+
+
+# Setup function (must be at the module level)
+async def setup(bot):
+    await bot.add_cog(DashboardCog(bot))
@@ -1,8 +1,7 @@
-from bot.utils.library_api import (
-    login_and_get_cookie,
-    get_book_issue_info,
-    format_book_issue_data,
-)
+from bot.utils.library_api import fetch_books, format_book_issue
+from bot.utils.rendering import send_paginated
+from bot.utils.admission import run_upstream, user_cooldown
+from bot.utils.dashboard import update_books
 from discord.ext import commands
 from discord import app_commands
 import discord
@@ -15,22 +14,30 @@ class LibraryCog(commands.Cog):
     @app_commands.command(
         name="library", description="Get the details of your library books"
     )
+    @user_cooldown()
     async def library(self, interaction: discord.Interaction, username: str):
         """A slash command to fetch and display library book details."""
-        session_cookie = login_and_get_cookie(username, username)
+        await interaction.response.defer()  # Upstream slots may be busy
+        logged_in, book_issue_data = await run_upstream(
+            "library", fetch_books, username, username
+        )
 
-        if session_cookie:
-            book_issue_data = get_book_issue_info(session_cookie)
+        if logged_in and book_issue_data is not None:
+            await update_books(interaction.user.id, username, book_issue_data)
+
+        if logged_in:
             if book_issue_data:
-                await interaction.response.send_message(
-                    format_book_issue_data(book_issue_data)
+                await send_paginated(
+                    interaction,
+                    book_issue_data,
+                    format_book_issue,
+                    title="Library Book Issue Information",
+                    empty_message="No book issue data available.",
                 )
             else:
-                await interaction.response.send_message(
-                    "No book issue information received."
-                )
+                await interaction.followup.send("No book issue information received.")
         else:
-            await interaction.response.send_message(
+            await interaction.followup.send(
                 f"Incorrect username. {username} is not a correct username"
             )
 
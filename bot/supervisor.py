@@ -0,0 +1,175 @@
+# Run the bot as several shard processes, e.g.
+#   python -m bot.supervisor --shards 8 --processes 4
+# Each process runs a contiguous range of shards; exactly one (the elected leader)
+# runs background jobs. The FastAPI server runs here and reports /health/shards and
+# the metrics each process publishes with its health.
+import os
+import sys
+import glob
+import time
+import signal
+import logging
+import argparse
+import threading
+import subprocess
+import uvicorn
+from bot.utils.logging_setup import setup_logging
+from bot.utils.sharding import shard_ranges, read_health, write_leader
+from bot.utils.state import STATE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Seconds without a heartbeat before a process can no longer lead
+HEARTBEAT_TIMEOUT = 60
+# Seconds between supervisor checks
+CHECK_INTERVAL = 5
+# Seconds to wait before restarting a crashed process
+RESTART_DELAY = 5
+# Seconds a process gets to shut down (and save its snapshot) before it is killed
+STOP_TIMEOUT = 10
+
+# The bot's entry point, independent of the directory the supervisor is started from
+MAIN_SCRIPT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py"
+)
+
+
+class ShardProcess:
+    def __init__(self, index: int, shard_ids, shard_count: int):
+        self.index = index
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.process = None
+        self.started_at = 0.0
+        self.restarts = 0
+
+    def start(self):
+        env = dict(
+            os.environ,
+            SHARD_COUNT=str(self.shard_count),
+            SHARD_IDS=",".join(map(str, self.shard_ids)),
+            PROCESS_INDEX=str(self.index),
+            RUN_HTTP_SERVER="0",
+            SHARD_SUPERVISOR="0",
+        )
+        self.process = subprocess.Popen([sys.executable, MAIN_SCRIPT], env=env)
+        self.started_at = time.time()
+        logger.info(
+            "Started process %d (pid %d) for shards %s",
+            self.index,
+            self.process.pid,
+            self.shard_ids,
+        )
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def is_healthy(self) -> bool:
+        if not self.is_alive():
+            return False
+        health = read_health(self.index)
+        last_seen = health["updated_at"] if health else self.started_at
+        return time.time() - last_seen < HEARTBEAT_TIMEOUT
+
+    def terminate(self):
+        if self.is_alive():
+            self.process.terminate()
+
+    def wait_or_kill(self, deadline: float):
+        if not self.is_alive():
+            return
+        try:
+            self.process.wait(timeout=max(deadline - time.time(), 0))
+        except subprocess.TimeoutExpired:
+            logger.warning("Process %d did not stop in time, killing it", self.index)
+            self.process.kill()
+            self.process.wait()
+
+
+class Supervisor:
+    def __init__(self, shard_count: int, processes: int):
+        self.processes = [
+            ShardProcess(index, shard_ids, shard_count)
+            for index, shard_ids in enumerate(shard_ranges(shard_count, processes))
+        ]
+        self.leader = None
+        self._stopping = threading.Event()
+
+    # Keep the current leader while it is healthy, otherwise pick the lowest healthy index
+    def elect_leader(self):
+        healthy = [p.index for p in self.processes if p.is_healthy()]
+        if self.leader in healthy:
+            return
+        leader = healthy[0] if healthy else None
+        if leader is not None and leader != self.leader:
+            write_leader(leader)
+            logger.info("Process %d is now the background job leader", leader)
+            self.leader = leader
+
+    def check(self):
+        for shard_process in self.processes:
+            if shard_process.is_alive():
+                continue
+            if time.time() - shard_process.started_at < RESTART_DELAY:
+                continue
+            logger.warning(
+                "Process %d exited with %s, restarting",
+                shard_process.index,
+                shard_process.process.returncode,
+            )
+            shard_process.restarts += 1
+            shard_process.start()
+        self.elect_leader()
+
+    # Stop the shard processes together: SIGTERM to all, then wait for them
+    def stop(self):
+        logger.info("Stopping the shard processes")
+        for shard_process in self.processes:
+            shard_process.terminate()
+        deadline = time.time() + STOP_TIMEOUT
+        for shard_process in self.processes:
+            shard_process.wait_or_kill(deadline)
+
+    def run(self):
+        # The host stops the service with SIGTERM; the children must go with it, or
+        # the next start runs a second set of processes for the same shards
+        signal.signal(signal.SIGTERM, lambda signum, frame: self._stopping.set())
+
+        # Drop health reports left over from a previous run
+        for path in glob.glob(os.path.join(STATE_DIR, "shard-health-*.json")):
+            os.remove(path)
+
+        for shard_process in self.processes:
+            shard_process.start()
+        self.elect_leader()
+        try:
+            while not self._stopping.wait(CHECK_INTERVAL):
+                self.check()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+
+def run_fastapi():
+    from server.main import app
+
+    uvicorn.run(app, host="0.0.0.0", port=8001)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the bot as shard processes.")
+    parser.add_argument("--shards", type=int, required=True, help="Total shards")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    setup_logging()
+    # The HTTP server reports the shard processes' metrics, not its own
+    os.environ["SHARD_SUPERVISOR"] = "1"
+    os.environ["SHARD_PROCESSES"] = str(len(shard_ranges(args.shards, args.processes)))
+    threading.Thread(target=run_fastapi, daemon=True).start()
+    Supervisor(args.shards, args.processes).run()
+
+
+if __name__ == "__main__":
+    main()
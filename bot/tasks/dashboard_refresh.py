@@ -0,0 +1,71 @@
+import os
+import asyncio
+import logging
+from bot.tasks.due_date_check import registered_password
+from bot.tasks.scheduler import Interval, job
+from bot.utils.admission import run_upstream, background_priority
+from bot.utils.classroom_api import list_classrooms, list_announcements
+from bot.utils.google_auth import get_credentials, prefetch_credentials
+from bot.utils.dashboard import (
+    AUTHORIZED,
+    NOT_AUTHORIZED,
+    active_views,
+    update_auth,
+    update_books,
+    update_courses,
+    update_announcements,
+)
+from bot.utils.scrape_pool import scrape_user_books
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_REFRESH_MINUTES = float(os.getenv("DASHBOARD_REFRESH_MINUTES", "30"))
+
+
+async def refresh_library(user_id, username):
+    # /library logs in with the username as password; registered users have their own
+    password = registered_password(username) or username
+    logged_in, books = await scrape_user_books(username, password)
+    if logged_in and books is not None:
+        await update_books(user_id, username, books)
+
+
+async def refresh_classroom(user_id):
+    creds = await get_credentials(user_id)
+    courses = await run_upstream("google", list_classrooms, user_id, creds)
+    if isinstance(courses, dict):
+        if "authorize" in courses.get("error", ""):
+            await update_auth(user_id, NOT_AUTHORIZED)
+        return
+
+    await update_courses(user_id, courses)
+    for course in courses:
+        items = await run_upstream(
+            "google", list_announcements, course["id"], user_id, creds
+        )
+        if isinstance(items, list):
+            await update_announcements(user_id, course["id"], items)
+
+
+async def refresh_view(user_id, view):
+    try:
+        if view["library_username"]:
+            await refresh_library(user_id, view["library_username"])
+        if view["auth_status"] == AUTHORIZED:
+            await refresh_classroom(user_id)
+    except Exception as e:
+        logger.error("Failed to refresh dashboard of user %s: %s", user_id, e)
+
+
+# Background job keeping recently used dashboards fresh
+@job("dashboard_refresh", Interval(DASHBOARD_REFRESH_MINUTES * 60))
+async def refresh_dashboards(bot):
+    views = await active_views()
+    logger.info("Refreshing %d dashboard(s)...", len(views))
+    with background_priority():
+        # One bulk token request instead of one per user
+        await prefetch_credentials(
+            [user_id for user_id, view in views if view["auth_status"] == AUTHORIZED]
+        )
+        await asyncio.gather(*(refresh_view(user_id, view) for user_id, view in views))
+    logger.info("Dashboard refresh completed.")
@@ -1,7 +1,19 @@
+import os
+import asyncio
 import logging
 import discord
-from discord.ext import tasks
-from bot.utils.library_api import login_and_get_cookie, get_book_issue_info
+from bot.utils.models import select_due_soon
+from bot.utils.admission import background_priority
+from bot.utils.scrape_pool import scrape_user_books
+from bot.utils.dashboard import update_books
+from bot.tasks.scheduler import Daily, job
+
+logger = logging.getLogger(__name__)
+
+# Notify about books due within this many days
+DUE_SOON_DAYS = 3
+# Local time of the daily check
+DUE_DATE_CHECK_TIME = os.getenv("DUE_DATE_CHECK_TIME", "08:00")
 
 # Registered users
 registered_users = {
@@ -9,53 +21,67 @@ registered_users = {
         "username": "078BEI010",
         "password": "078BEI010",
         "user_id": "748162601237872682",
-        "notified": False,
     },
 }
 
 
-# Background task to check due dates daily
-@tasks.loop(hours=24)
-async def check_due_dates(bot):
-    logging.info("Starting daily due date check...")
-    for user, data in registered_users.items():
-        password = data["password"]
-        username = data["username"]
-        user_id = data["user_id"]
-        session_cookie = login_and_get_cookie(username, password)
-
-        if session_cookie:
-            library_details = get_book_issue_info(session_cookie)
-            if library_details:
-                for book in library_details:
-                    try:
-                        # Extract the number of days from the "Over Due" field
-                        over_due_days = int(book["Over Due"].split()[0])
-                    except (KeyError, ValueError, IndexError) as e:
-                        logging.error(
-                            f"Error parsing 'Over Due' field for user {username}: {e}"
-                        )
-                        continue
-
-                    # Check if the book is due in 3 days or less
-                    if -3 <= over_due_days <= 0 and not data["notified"]:
-                        try:
-                            user = await bot.fetch_user(user_id)
-                            await user.send(
-                                f"📚 **Library Due Date Alert**\n"
-                                f"Your book **{book['Title']}** is due in **{abs(over_due_days)} days** (Due Date: {book['Return Date']}).\n"
-                                f"Please return or renew it soon!"
-                            )
-                            logging.info(
-                                f"Notification sent to user {user_id} for book {book['Title']}."
-                            )
-                        except discord.errors.DiscordException as e:
-                            logging.error(
-                                f"Failed to send notification to user {user_id}: {e}"
-                            )
-            data["notified"] = True
-
-    # Reset the "notified" flag for all users at the end of the day
+# Password of a registered library user, if the bot knows it
+def registered_password(username: str):
     for data in registered_users.values():
-        data["notified"] = False
-    logging.info("Daily due date check completed.")
+        if data["username"] == username:
+            return data["password"]
+    return None
+
+
+# Fetch the issued books of one registered user (scraped in the worker pool)
+async def fetch_user_books(data):
+    username = data["username"]
+    try:
+        logged_in, books = await scrape_user_books(username, data["password"])
+    except Exception as e:
+        logger.error("Failed to fetch the books of %s: %s", username, e)
+        return None
+    if not logged_in:
+        logger.error("Failed to log in to the library as %s", username)
+    return books
+
+
+# Fetch the issued books of every registered user, keyed by Discord user id.
+# Runs as background work so slash commands get library slots first.
+async def fetch_all_books():
+    with background_priority():
+        results = await asyncio.gather(
+            *(fetch_user_books(data) for data in registered_users.values())
+        )
+    books_by_user = {}
+    for data, books in zip(registered_users.values(), results):
+        if books is None:
+            continue
+        # Fresh data also refreshes the user's /dashboard
+        await update_books(data["user_id"], data["username"], books)
+        books_by_user[data["user_id"]] = books
+    return books_by_user
+
+
+# Background job to check due dates daily (run by the leader process only)
+@job("due_date_check", Daily(at=DUE_DATE_CHECK_TIME))
+async def check_due_dates(bot):
+    logger.info("Starting daily due date check...")
+    books_by_user = await fetch_all_books()
+
+    # One pass over every user's books selects the ones due soon
+    for user_id, book in select_due_soon(books_by_user, DUE_SOON_DAYS):
+        try:
+            user = await bot.fetch_user(user_id)
+            await user.send(
+                f"📚 **Library Due Date Alert**\n"
+                f"Your book **{book.title}** is due in **{book.days_until_due} days** (Due Date: {book.return_date}).\n"
+                f"Please return or renew it soon!"
+            )
+            logger.info(
+                "Notification sent to user %s for book %s.", user_id, book.title
+            )
+        except discord.errors.DiscordException as e:
+            logger.error("Failed to send notification to user %s: %s", user_id, e)
+
+    logger.info("Daily due date check completed.")
@@ -0,0 +1,330 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import datetime
+from dataclasses import dataclass
+from bot.utils.sharding import is_leader
+from bot.utils.state import state_path
+
+logger = logging.getLogger(__name__)
+
+JOBS_STATE_FILE = "jobs.json"
+LOCK_FILE = "scheduler.lock"
+# Longest sleep between checks for due jobs (also how fast leadership changes apply)
+TICK_SECONDS = 30
+# Upper bounds of the job duration histogram buckets, in seconds
+DURATION_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 300, 900)
+
+
+# Run every `seconds`
+@dataclass(frozen=True)
+class Interval:
+    seconds: float
+
+    def next_run(self, after: float, state: dict) -> float:
+        return after + self.seconds
+
+
+# Run every day at a local "HH:MM", optionally only on some weekdays (0 is Monday)
+@dataclass(frozen=True)
+class Daily:
+    at: str
+    weekdays: tuple = None
+
+    def next_run(self, after: float, state: dict) -> float:
+        hour, minute = (int(part) for part in self.at.split(":"))
+        moment = datetime.datetime.fromtimestamp(after)
+        candidate = moment.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if candidate <= moment:
+            candidate += datetime.timedelta(days=1)
+        while self.weekdays is not None and candidate.weekday() not in self.weekdays:
+            candidate += datetime.timedelta(days=1)
+        return candidate.timestamp()
+
+
+# Run sooner while the job keeps finding work (it returns something truthy) and back
+# off towards max_seconds while it does not
+@dataclass(frozen=True)
+class Adaptive:
+    min_seconds: float
+    max_seconds: float
+
+    def next_run(self, after: float, state: dict) -> float:
+        return after + state.get("interval", self.min_seconds)
+
+    def adapt(self, state: dict, found_work: bool):
+        interval = state.get("interval", self.min_seconds)
+        if found_work:
+            interval = max(self.min_seconds, interval / 2)
+        else:
+            interval = min(self.max_seconds, interval * 2)
+        state["interval"] = interval
+
+
+@dataclass(frozen=True)
+class Job:
+    name: str
+    func: object  # async def func(bot)
+    schedule: object
+    # Runs of this job allowed at once; a due run over the limit is skipped
+    max_concurrency: int = 1
+    # Run once at start-up if a run was missed while the bot was down
+    catch_up: bool = True
+
+
+# Registered jobs by name
+jobs = {}
+
+
+# Declare a background job, e.g. @job("due_date_check", Daily(at="08:00"))
+def job(name: str, schedule, **options):
+    def register(func):
+        jobs[name] = Job(name=name, func=func, schedule=schedule, **options)
+        return func
+
+    return register
+
+
+def _empty_state() -> dict:
+    return {
+        "last_run": None,
+        "last_finished": None,
+        "next_run": None,
+        "last_duration_s": None,
+        "last_error": None,
+        "runs": 0,
+        "failures": 0,
+        "skipped": 0,
+        "histogram": {
+            "buckets": [0] * (len(DURATION_BUCKETS) + 1),
+            "sum_s": 0.0,
+            "count": 0,
+        },
+    }
+
+
+def read_job_state() -> dict:
+    try:
+        with open(state_path(JOBS_STATE_FILE), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_job_state(states: dict):
+    path = state_path(JOBS_STATE_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(states, f)
+    os.replace(path + ".tmp", path)
+
+
+def observe_duration(histogram: dict, seconds: float):
+    index = next(
+        (i for i, bound in enumerate(DURATION_BUCKETS) if seconds <= bound),
+        len(DURATION_BUCKETS),
+    )
+    histogram["buckets"][index] += 1
+    histogram["sum_s"] += seconds
+    histogram["count"] += 1
+
+
+# Persisted job state with the histogram buckets labelled, for /metrics/jobs
+def job_stats() -> dict:
+    stats = {}
+    for name, state in read_job_state().items():
+        # State written by older versions may have no histogram
+        histogram = state.get("histogram") or _empty_state()["histogram"]
+        labels = [f"le_{bound}" for bound in DURATION_BUCKETS] + ["le_inf"]
+        stats[name] = {
+            **state,
+            "histogram": {
+                **histogram,
+                "buckets": dict(zip(labels, histogram["buckets"])),
+            },
+        }
+    return stats
+
+
+# An exclusive lock on a file in the state directory, held while this process runs
+# jobs; the OS releases it if the process dies
+class InstanceLock:
+    def __init__(self, name: str = LOCK_FILE):
+        self.name = name
+        self._file = None
+
+    @property
+    def held(self) -> bool:
+        return self._file is not None
+
+    def acquire(self) -> bool:
+        if self._file is not None:
+            return True
+        f = open(state_path(self.name), "a+")
+        try:
+            _lock_file(f)
+        except OSError:
+            f.close()
+            return False
+        f.seek(0)
+        f.truncate()
+        f.write(str(os.getpid()))
+        f.flush()
+        self._file = f
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            _unlock_file(self._file)
+        finally:
+            self._file.close()
+            self._file = None
+
+
+try:
+    import fcntl
+
+    def _lock_file(f):
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _unlock_file(f):
+        fcntl.flock(f, fcntl.LOCK_UN)
+
+except ImportError:  # Windows
+    import msvcrt
+
+    def _lock_file(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+
+    def _unlock_file(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class Scheduler:
+    def __init__(self, jobs: dict):
+        self.jobs = jobs
+        self.lock = InstanceLock()
+        self.states = {}
+        self._running = {}  # job name -> runs in progress
+        self._task = None
+
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, bot):
+        if self.is_running():
+            return
+        self._task = asyncio.create_task(self._run(bot))
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+        self.lock.release()
+
+    # Load the persisted state and decide when each job runs next
+    def _load(self, now: float):
+        saved = read_job_state()
+        for name, job in self.jobs.items():
+            state = {**_empty_state(), **saved.get(name, {})}
+            missed = state["next_run"] is not None and state["next_run"] <= now
+            if missed and job.catch_up:
+                logger.info("Job %s missed a run, catching up.", name)
+                state["next_run"] = now
+            elif state["next_run"] is None or missed:
+                if isinstance(job.schedule, Interval):
+                    state["next_run"] = now  # Like tasks.loop, run on start
+                else:
+                    state["next_run"] = job.schedule.next_run(now, state)
+            self.states[name] = state
+
+    def _save(self):
+        try:
+            write_job_state(self.states)
+        except OSError as e:
+            logger.error("Failed to save job state: %s", e)
+
+    # Jobs run in one process only: the elected leader (see bot.utils.sharding),
+    # which must also hold the instance lock on the state directory
+    def _may_run(self) -> bool:
+        if not is_leader():
+            if self.lock.held:
+                logger.info("No longer the leader, releasing the scheduler lock.")
+                self.lock.release()
+            return False
+        if self.lock.held:
+            return True
+        try:
+            acquired = self.lock.acquire()
+        except OSError as e:
+            # e.g. the state directory is not writable; try again next tick
+            logger.error("Failed to open the scheduler lock: %s", e)
+            return False
+        if not acquired:
+            logger.warning("Another process holds the scheduler lock.")
+            return False
+        # The previous lock holder may have run jobs since this process last did
+        self._load(time.time())
+        self._save()
+        return True
+
+    async def _run(self, bot):
+        while True:
+            if not self._may_run():
+                await asyncio.sleep(TICK_SECONDS)
+                continue
+
+            now = time.time()
+            for name, job in self.jobs.items():
+                if self.states[name]["next_run"] <= now:
+                    self._start_job(bot, job, now)
+            next_due = min(
+                (state["next_run"] for state in self.states.values()),
+                default=now + TICK_SECONDS,
+            )
+            await asyncio.sleep(min(max(next_due - time.time(), 1), TICK_SECONDS))
+
+    def _start_job(self, bot, job: Job, now: float):
+        state = self.states[job.name]
+        state["next_run"] = job.schedule.next_run(now, state)
+        if self._running.get(job.name, 0) >= job.max_concurrency:
+            logger.warning("Job %s is still running, skipping this run.", job.name)
+            state["skipped"] += 1
+            self._save()
+            return
+        self._running[job.name] = self._running.get(job.name, 0) + 1
+        asyncio.create_task(self._run_job(bot, job))
+
+    async def _run_job(self, bot, job: Job):
+        state = self.states[job.name]
+        state["last_run"] = time.time()
+        self._save()
+        start = time.perf_counter()
+        result = None
+        try:
+            result = await job.func(bot)
+            state["last_error"] = None
+        except Exception as e:
+            logger.error("Job %s failed: %s", job.name, e, exc_info=e)
+            state["failures"] += 1
+            state["last_error"] = str(e)
+        finally:
+            self._running[job.name] -= 1
+
+        duration = time.perf_counter() - start
+        state["runs"] += 1
+        state["last_finished"] = time.time()
+        state["last_duration_s"] = round(duration, 3)
+        observe_duration(state["histogram"], duration)
+        if isinstance(job.schedule, Adaptive):
+            job.schedule.adapt(state, bool(result))
+            state["next_run"] = job.schedule.next_run(state["last_finished"], state)
+        self._save()
+        logger.info("Job %s finished in %.1fs", job.name, duration)
+
+
+scheduler = Scheduler(jobs)
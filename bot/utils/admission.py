@@ -0,0 +1,152 @@
+import os
+import heapq
+import time
+import threading
+import asyncio
+import itertools
+import contextvars
+from enum import IntEnum
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from discord import app_commands
+from bot.utils.metrics import percentile
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0  # Slash commands: a user is waiting for the reply
+    BACKGROUND = 1  # Due date sweep, pollers
+
+
+# Priority of upstream calls made from the current task (slash commands by default)
+current_priority = contextvars.ContextVar(
+    "current_priority", default=Priority.INTERACTIVE
+)
+
+# Maximum concurrent calls per upstream service
+UPSTREAM_LIMITS = {
+    "library": int(os.getenv("LIBRARY_CONCURRENCY", "4")),
+    "backend": int(os.getenv("BACKEND_CONCURRENCY", "8")),
+    "google": int(os.getenv("GOOGLE_CONCURRENCY", "8")),
+}
+
+# Per-user command cooldown: COMMAND_RATE uses every COMMAND_PER seconds
+COMMAND_RATE = int(os.getenv("COMMAND_RATE", "2"))
+COMMAND_PER = float(os.getenv("COMMAND_PER", "10"))
+
+
+# A concurrency cap for one upstream; queued callers are served by priority, then FIFO.
+# The cap is shared by the bot's event loop and the HTTP server's (another thread), so
+# the state is guarded by a lock and slots are handed over on the waiter's own loop.
+class UpstreamLane:
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self.in_use = 0
+        self._waiters = []  # heap of (priority, sequence, future)
+        self._sequence = itertools.count()
+        self._wait_ms = {priority: deque(maxlen=1000) for priority in Priority}
+        self._lock = threading.Lock()
+
+    def queued(self, priority: Priority) -> int:
+        with self._lock:
+            return sum(
+                1
+                for p, _, future in self._waiters
+                if p == priority and not future.done()
+            )
+
+    async def acquire(self, priority: Priority):
+        start = time.perf_counter()
+        future = None
+        with self._lock:
+            if self.in_use < self.limit and not self._waiters:
+                self.in_use += 1
+            else:
+                future = asyncio.get_running_loop().create_future()
+                heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        if future is not None:
+            try:
+                await future
+            except asyncio.CancelledError:
+                # The slot may have been handed over right before the cancellation
+                if future.done() and not future.cancelled():
+                    self.release()
+                raise
+        self._wait_ms[priority].append((time.perf_counter() - start) * 1000)
+
+    def release(self):
+        # Hand the slot straight to the highest priority waiter
+        future = None
+        with self._lock:
+            while self._waiters and future is None:
+                _, _, waiter = heapq.heappop(self._waiters)
+                if not waiter.done():
+                    future = waiter
+            if future is None:
+                self.in_use -= 1
+                return
+        # Futures may only be resolved from their own loop's thread
+        try:
+            future.get_loop().call_soon_threadsafe(self._hand_over, future)
+        except RuntimeError:  # That loop is closed
+            self.release()
+
+    def _hand_over(self, future):
+        if future.cancelled():
+            # The waiter gave up after it was picked; pass the slot on
+            self.release()
+        else:
+            future.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority = None):
+        await self.acquire(current_priority.get() if priority is None else priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "in_use": self.in_use,
+            "queued": {p.name.lower(): self.queued(p) for p in Priority},
+            "wait_ms": {
+                p.name.lower(): {
+                    "p50": round(percentile(list(waits), 50), 2),
+                    "p99": round(percentile(list(waits), 99), 2),
+                    "max": round(max(waits, default=0.0), 2),
+                }
+                for p, waits in self._wait_ms.items()
+            },
+        }
+
+
+lanes = {name: UpstreamLane(name, limit) for name, limit in UPSTREAM_LIMITS.items()}
+
+
+# Run a blocking upstream call in a thread once the upstream has a free slot
+async def run_upstream(upstream: str, func, *args, **kwargs):
+    async with lanes[upstream].slot():
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+
+# Mark upstream calls made inside the block (and tasks it spawns) as background work
+@contextmanager
+def background_priority():
+    token = current_priority.set(Priority.BACKGROUND)
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+
+def admission_stats() -> dict:
+    return {name: lane.stats() for name, lane in lanes.items()}
+
+
+# Slash command check limiting how often one user can run the command
+def user_cooldown(rate: int = COMMAND_RATE, per: float = COMMAND_PER):
+    return app_commands.checks.cooldown(
+        rate, per, key=lambda interaction: interaction.user.id
+    )
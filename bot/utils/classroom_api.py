@@ -1,35 +1,72 @@
+import os
+import time
 import datetime
-from bot.utils.google_auth import get_credentials, logger
+from cachetools import LRUCache
+from bot.utils.google_auth import logger
+from bot.utils.logouts import logged_out_since
+from bot.utils.models import ClassroomItem
+from bot.utils.search_index import get_search_index
+from bot.utils.snapshot import register_cache
 from googleapiclient.discovery import build
-from dateutil import parser
 
+# Override the Classroom API host (e.g. a local stub server)
+CLASSROOM_API_ENDPOINT = os.getenv("CLASSROOM_API_ENDPOINT")
 
-# Use the Google Classroom Service
-def get_classroom_service(client_id):
-    try:
-        creds = get_credentials(client_id)
+# Items fetched per course; all of them feed the search index, the top 3 are shown
+ITEMS_PAGE_SIZE = 20
+
+# (fetched at, course list) per client id; courses rarely change
+courses_cache = register_cache(
+    "classroom_courses",
+    ttl=float(os.getenv("COURSES_CACHE_SECONDS", "900")),
+    version=2,
+)
+
+# Formatted text per (item id, update time); an edited item gets a new key
+formatted_items = LRUCache(maxsize=int(os.getenv("FORMAT_CACHE_SIZE", "2000")))
+
+# Sort key for items without a creation time
+_OLDEST = datetime.datetime.min.replace(tzinfo=datetime.timezone.utc)
 
+
+# Use the Google Classroom Service with the result of (async) get_credentials
+def get_classroom_service(creds):
+    try:
         if isinstance(creds, dict) and "auth_url" in creds:
             return creds["auth_url"]  # Return the auth URL for the user to authorize
         elif isinstance(creds, dict) and "error" in creds:
-            logger.error(f"Error in credentials: {creds['error']}")
+            logger.error("Error in credentials: %s", creds["error"])
             return {"error": creds["error"]}
         elif creds:
             # If valid credentials are found, build the Classroom service
-            return build("classroom", "v1", credentials=creds)
+            client_options = (
+                {"api_endpoint": CLASSROOM_API_ENDPOINT}
+                if CLASSROOM_API_ENDPOINT
+                else None
+            )
+            return build(
+                "classroom", "v1", credentials=creds, client_options=client_options
+            )
         else:
             logger.error("No valid credentials found.")
             return {"error": "No valid credentials found. Please authorize first."}
 
     except Exception as e:
-        logger.error(f"Failed to get classroom service: {e}")
+        logger.error("Failed to get classroom service: %s", e)
         return {"error": "Failed to get classroom service. Please try again later."}
 
 
 # List all the classrooms
-def list_classrooms(client_id):
+def list_classrooms(client_id, creds):
+    # Cached courses only go to users with credentials, and not past a logout in any
+    # process (this cache is per process and kept in its snapshot)
+    if creds and not isinstance(creds, dict):
+        entry = courses_cache.get(client_id)
+        if entry is not None and not logged_out_since(client_id, entry[0]):
+            return entry[1]
+
     try:
-        service = get_classroom_service(client_id)
+        service = get_classroom_service(creds)
 
         # Check if the response contains an error or auth_url
         if isinstance(service, dict) and "error" in service:
@@ -40,117 +77,145 @@ def list_classrooms(client_id):
         # Fetch the list of classrooms
         results = service.courses().list(pageSize=10).execute()
         courses = results.get("courses", [])
-        logger.info(f"Fetched {len(courses)} classrooms for user {client_id}")
+        logger.info("Fetched %d classrooms for user %s", len(courses), client_id)
+        courses_cache.set(client_id, (time.time(), courses))
         return courses
 
     except Exception as e:
-        logger.error(f"Failed to fetch classrooms: {e}")
+        logger.error("Failed to fetch classrooms: %s", e)
         return {"error": "Failed to fetch classrooms. Please try again later."}
 
 
+# Forget cached and indexed Classroom data of a user (e.g. on logout)
+def forget_classroom_user(client_id):
+    courses_cache.delete(client_id)
+    get_search_index().remove_user(client_id)
+
+
+# Material type (its key in the API's material object) -> function rendering it
+MATERIAL_RENDERERS = {}
+
+
+def material_renderer(material_type: str):
+    def register(render):
+        MATERIAL_RENDERERS[material_type] = render
+        return render
+
+    return register
+
+
+@material_renderer("driveFile")
+def render_drive_file(drive_file: dict) -> str:
+    title = drive_file.get("title", "Untitled")
+    file_id = drive_file.get("driveFile", {}).get("id", "Unknown ID")
+    return (
+        f"📄 Drive File: {title} (URL: https://drive.google.com/file/d/{file_id}/view)"
+    )
+
+
+@material_renderer("youtubeVideo")
+def render_youtube_video(youtube_video: dict) -> str:
+    title = youtube_video.get("title", "Untitled")
+    url = youtube_video.get("alternateLink", "Unknown URL")
+    return f"🎥 YouTube Video: {title} (URL: {url})"
+
+
+@material_renderer("link")
+def render_link(link: dict) -> str:
+    title = link.get("title", "Untitled")
+    url = link.get("url", "Unknown URL")
+    return f"🔗 Link: {title} (URL: {url})"
+
+
+def render_material(material: dict) -> str:
+    for material_type, data in material.items():
+        render = MATERIAL_RENDERERS.get(material_type)
+        if render is not None:
+            return render(data)
+    return "📦 Unknown Material Type"
+
+
+# Format the materials (drive files, videos, links) attached to an item
+def format_materials(materials) -> str:
+    materials_info = []
+    for material in materials:
+        try:
+            materials_info.append(render_material(material))
+        except Exception as e:
+            logger.error("Failed to process material: %s", e)
+            logger.debug("Material data: %s", material)
+    return "\n".join(materials_info)
+
+
+# Format the body of an announcement or coursework material, cached until it is edited
+def format_item(item: ClassroomItem) -> str:
+    key = (item.id, item.update_time)
+    text = formatted_items.get(key) if item.id else None
+    if text is not None:
+        return text
+
+    lines = [
+        f"**Description**: {item.description if item.description else 'No description'}",
+        f"**Content**: {item.text if item.text else 'No content'}",
+        f"**Posted On**: {item.posted_date}",
+    ]
+    materials = format_materials(item.materials)
+    if materials:
+        lines.append("**Materials:**")
+        lines.append(materials)
+    text = "\n".join(lines)
+    if item.id:
+        formatted_items[key] = text
+    return text
+
+
 # List Top 3 announcements for each course
-def list_announcements(course_id, client_id):
+def list_announcements(course_id, client_id, creds):
     try:
-        service = get_classroom_service(client_id)
+        service = get_classroom_service(creds)
         if isinstance(service, dict) and "error" in service:
             return service
         elif isinstance(service, str):
             return {"error": "Please authorize first to access Google Classroom."}
 
-        # Fetch announcements and coursework materials
+        # Fetch announcements and coursework materials. Classroom list responses
+        # carry no etag, so they bypass the conditional request cache (hashing and
+        # looking up the body cost more than parsing the ~20 items).
         announcements = (
             service.courses()
             .announcements()
-            .list(courseId=int(course_id), pageSize=3)
+            .list(courseId=int(course_id), pageSize=ITEMS_PAGE_SIZE)
             .execute()
         ).get("announcements", [])
 
         coursework_materials = (
             service.courses()
             .courseWorkMaterials()
-            .list(courseId=int(course_id), pageSize=3)
+            .list(courseId=int(course_id), pageSize=ITEMS_PAGE_SIZE)
             .execute()
         ).get("courseWorkMaterial", [])
 
-        all_items = []
-        for item in announcements:
-            item["type"] = "announcement"
-            all_items.append(item)
-        for item in coursework_materials:
-            item["type"] = "courseWorkMaterial"
-            all_items.append(item)
-
-        all_items.sort(key=lambda x: x.get("creationTime", ""), reverse=True)
-
-        # Format top 3 items
-        top_items = []
-        for index, item in enumerate(all_items[:3], start=1):
-            creation_time = item.get("creationTime", "")
-            posted_date = (
-                parser.isoparse(creation_time.replace("Z", "+00:00")).strftime(
-                    "%Y-%m-%d %H:%M:%S"
-                )
-                if creation_time
-                else "Unknown"
-            )
-
-            if item["type"] == "announcement":
-                content = item.get("text", "No content provided.")
-                description = item.get("description")
-                materials = item.get("materials", [])
-            elif item["type"] == "courseWorkMaterial":
-                content = item.get("title", "No title provided.")
-                description = item.get("description")
-                materials = item.get("materials", [])
-
-            materials_info = []
-            for material in materials:
-                try:
-                    if "driveFile" in material:
-                        drive_file = material["driveFile"]
-                        title = drive_file.get("title", "Untitled")
-                        file_id = drive_file.get("driveFile", {}).get(
-                            "id", "Unknown ID"
-                        )
-                        drive_url = f"https://drive.google.com/file/d/{file_id}/view"
-                        materials_info.append(
-                            f"📄 Drive File: {title} (URL: {drive_url})"
-                        )
-                    elif "youtubeVideo" in material:
-                        youtube_video = material["youtubeVideo"]
-                        title = youtube_video.get("title", "Untitled")
-                        url = youtube_video.get("alternateLink", "Unknown URL")
-                        materials_info.append(f"🎥 YouTube Video: {title} (URL: {url})")
-                    elif "link" in material:
-                        link = material["link"]
-                        title = link.get("title", "Untitled")
-                        url = link.get("url", "Unknown URL")
-                        materials_info.append(f"🔗 Link: {title} (URL: {url})")
-                    else:
-                        materials_info.append("📦 Unknown Material Type")
-                except Exception as e:
-                    logger.error(f"Failed to process material: {e}")
-                    logger.debug(f"Material data: {material}")
-
-            if materials_info:
-                content += "\n**Materials:**\n" + "\n".join(materials_info)
-
-            top_items.append(
-                {
-                    "title": f"{item['type'].capitalize()} {index}",
-                    "content": content,
-                    "description": description,
-                    "posted_date": posted_date,
-                    "type": item["type"],
-                }
-            )
+        all_items = [
+            ClassroomItem.from_api("announcement", item) for item in announcements
+        ] + [
+            ClassroomItem.from_api("courseWorkMaterial", item)
+            for item in coursework_materials
+        ]
+        try:
+            get_search_index().index_items(client_id, all_items)
+        except Exception as e:
+            logger.error("Failed to index items: %s", e)
+        all_items.sort(key=lambda item: item.creation_time or _OLDEST, reverse=True)
+
+        # Keep the top 3 items; they are formatted only when displayed
+        top_items = all_items[:3]
 
         if not top_items:
-            logger.info(f"No items found for course {course_id}.")
+            logger.info("No items found for course %s.", course_id)
             return {"error": "No items found for this course."}
 
-        logger.info(f"Fetched {len(top_items)} top items for course {course_id}.")
+        logger.info("Fetched %d top items for course %s.", len(top_items), course_id)
         return top_items
     except Exception as e:
-        logger.error(f"Failed to fetch items: {e}")
+        logger.error("Failed to fetch items: %s", e)
         return {"error": "Failed to fetch items. Please try again later."}
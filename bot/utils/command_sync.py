@@ -0,0 +1,88 @@
+import os
+import json
+import hashlib
+import logging
+import discord
+from discord import app_commands
+from bot.utils.state import state_path
+
+logger = logging.getLogger(__name__)
+
+# Sync slash commands to this guild only (instant updates while developing)
+DEV_GUILD_ID = os.getenv("DEV_GUILD_ID")
+# Set to "1" to sync even if the command tree did not change
+FORCE_SYNC = os.getenv("FORCE_COMMAND_SYNC") == "1"
+
+FINGERPRINT_FILE = "command_sync.json"
+
+
+# Describe a single command (or group) as plain data
+def _describe_command(command):
+    data = {
+        "name": command.name,
+        "description": getattr(command, "description", ""),
+        "type": type(command).__name__,
+    }
+    if isinstance(command, app_commands.Group):
+        data["commands"] = [_describe_command(sub) for sub in command.commands]
+    elif isinstance(command, app_commands.Command):
+        data["parameters"] = [
+            {
+                "name": param.name,
+                "description": param.description,
+                "type": param.type.value,
+                "required": param.required,
+                "choices": [choice.value for choice in param.choices],
+                "min_value": param.min_value,
+                "max_value": param.max_value,
+            }
+            for param in command.parameters
+        ]
+    return data
+
+
+# Hash the names, descriptions and parameters of every command in the tree
+def command_tree_fingerprint(tree: app_commands.CommandTree, guild=None) -> str:
+    commands = sorted(
+        (_describe_command(command) for command in tree.get_commands(guild=guild)),
+        key=lambda command: (command["type"], command["name"]),
+    )
+    payload = json.dumps(commands, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _load_fingerprints():
+    try:
+        with open(state_path(FINGERPRINT_FILE), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+# Write to a temporary file first, so a crash never leaves a truncated file behind
+def _save_fingerprints(fingerprints):
+    path = state_path(FINGERPRINT_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(fingerprints, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+# Sync the command tree only when it changed since the last successful sync
+async def sync_commands(bot) -> bool:
+    guild = discord.Object(id=int(DEV_GUILD_ID)) if DEV_GUILD_ID else None
+    if guild:
+        bot.tree.copy_global_to(guild=guild)
+
+    scope = f"guild:{guild.id}" if guild else "global"
+    fingerprints = _load_fingerprints()
+    fingerprint = command_tree_fingerprint(bot.tree, guild=guild)
+
+    if not FORCE_SYNC and fingerprints.get(scope) == fingerprint:
+        logger.info("Command tree unchanged for %s, skipping sync.", scope)
+        return False
+
+    synced = await bot.tree.sync(guild=guild)
+    fingerprints[scope] = fingerprint
+    _save_fingerprints(fingerprints)
+    logger.info("Synced %d command(s) for %s.", len(synced), scope)
+    return True
@@ -0,0 +1,230 @@
+import os
+import time
+import asyncio
+import pickle
+import sqlite3
+import logging
+import threading
+from bot.utils.state import state_path
+
+logger = logging.getLogger(__name__)
+
+# Keep a user's dashboard for a week after the last update
+DASHBOARD_TTL = 7 * 24 * 60 * 60
+# Users who opened /dashboard within this many seconds are refreshed in the background
+DASHBOARD_ACTIVE_SECONDS = float(
+    os.getenv("DASHBOARD_ACTIVE_SECONDS", str(3 * 24 * 60 * 60))
+)
+# Seconds a write waits for another process' write lock before failing
+DASHBOARD_BUSY_TIMEOUT = float(os.getenv("DASHBOARD_BUSY_TIMEOUT", "2"))
+# Announcements kept per course
+ANNOUNCEMENTS_PER_COURSE = 5
+
+AUTHORIZED = "authorized"
+NOT_AUTHORIZED = "not authorized"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS views (
+    user_id TEXT PRIMARY KEY,
+    view BLOB NOT NULL,
+    updated_at REAL NOT NULL,
+    last_viewed_at REAL
+);
+"""
+
+
+def _empty_view() -> dict:
+    return {
+        "library_username": None,
+        "books": None,
+        "books_updated_at": None,
+        "courses": {},  # course id -> {"name", "items", "updated_at"}
+        "auth_status": None,
+        "auth_updated_at": None,
+        "last_viewed_at": None,
+    }
+
+
+# Materialized per-user dashboards in SQLite under the state directory, shared by every
+# process: commands in any /interactions worker or shard process update and read the
+# same views the leader's background refresh keeps fresh.
+class DashboardStore:
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        # Autocommit, so updates can take the write lock up front (BEGIN IMMEDIATE)
+        self._db = sqlite3.connect(
+            path,
+            timeout=DASHBOARD_BUSY_TIMEOUT,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+
+    def _load(self, row):
+        view = pickle.loads(row[0])
+        view["last_viewed_at"] = row[1]
+        return view
+
+    def get(self, user_id: str):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT view, last_viewed_at FROM views"
+                " WHERE user_id = ? AND updated_at > ?",
+                (user_id, time.time() - DASHBOARD_TTL),
+            ).fetchone()
+        return self._load(row) if row else None
+
+    # Read-modify-write a view; `change` gets the current view and returns the changes.
+    # The write lock is held throughout, so concurrent processes never lose an update.
+    def update(self, user_id: str, change) -> dict:
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT view, last_viewed_at FROM views WHERE user_id = ?",
+                    (user_id,),
+                ).fetchone()
+                view = self._load(row) if row else _empty_view()
+                view = {**view, **change(view)}
+                self._db.execute(
+                    "INSERT INTO views (user_id, view, updated_at, last_viewed_at)"
+                    " VALUES (?, ?, ?, ?) ON CONFLICT (user_id) DO UPDATE SET"
+                    " view = excluded.view, updated_at = excluded.updated_at",
+                    (
+                        user_id,
+                        pickle.dumps(view, protocol=pickle.HIGHEST_PROTOCOL),
+                        time.time(),
+                        view["last_viewed_at"],
+                    ),
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return view
+
+    def mark_viewed(self, user_id: str):
+        with self._lock:
+            self._db.execute(
+                "UPDATE views SET last_viewed_at = ? WHERE user_id = ?",
+                (time.time(), user_id),
+            )
+
+    # Views opened since `cutoff`, after dropping the ones past their TTL
+    def viewed_since(self, cutoff: float):
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM views WHERE updated_at <= ?",
+                (time.time() - DASHBOARD_TTL,),
+            )
+            rows = self._db.execute(
+                "SELECT user_id, view, last_viewed_at FROM views"
+                " WHERE last_viewed_at >= ?",
+                (cutoff,),
+            ).fetchall()
+        return [(user_id, self._load((view, viewed))) for user_id, view, viewed in rows]
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM views").fetchone()[0]
+
+
+_dashboard_store = None
+_dashboard_store_lock = threading.Lock()
+
+
+# The process' connection to the shared store, opened on first use
+def get_dashboard_store() -> DashboardStore:
+    global _dashboard_store
+    with _dashboard_store_lock:
+        if _dashboard_store is None:
+            _dashboard_store = DashboardStore(state_path("dashboards.sqlite3"))
+    return _dashboard_store
+
+
+# Run a store call in a thread: a write may wait up to DASHBOARD_BUSY_TIMEOUT for another
+# process' lock, which must not stall the event loop. The dashboard is bookkeeping next
+# to the commands, so a failure is logged and `default` returned instead of raised.
+async def _run(description: str, method: str, *args, default=None):
+    def call():
+        return getattr(get_dashboard_store(), method)(*args)
+
+    try:
+        return await asyncio.to_thread(call)
+    except sqlite3.Error as e:
+        logger.error("Failed to %s: %s", description, e)
+        return default
+
+
+async def get_view(user_id: str):
+    return await _run("read a dashboard", "get", str(user_id))
+
+
+async def _update(user_id: str, change):
+    await _run("update a dashboard", "update", str(user_id), change)
+
+
+async def update_books(user_id, library_username: str, books):
+    await _update(
+        user_id,
+        lambda view: {
+            "library_username": library_username,
+            "books": tuple(books or ()),
+            "books_updated_at": time.time(),
+        },
+    )
+
+
+async def update_auth(user_id, status: str):
+    changes = {"auth_status": status, "auth_updated_at": time.time()}
+    if status != AUTHORIZED:
+        changes["courses"] = {}
+    await _update(user_id, lambda view: changes)
+
+
+async def update_courses(user_id, courses):
+    def change(view):
+        updated = {}
+        for course in courses:
+            entry = view["courses"].get(course["id"], {"items": (), "updated_at": None})
+            updated[course["id"]] = {**entry, "name": course.get("name", course["id"])}
+        return {
+            "courses": updated,
+            "auth_status": AUTHORIZED,
+            "auth_updated_at": time.time(),
+        }
+
+    await _update(user_id, change)
+
+
+async def update_announcements(user_id, course_id: str, items):
+    def change(view):
+        courses = dict(view["courses"])
+        entry = courses.get(course_id, {"name": course_id})
+        courses[course_id] = {
+            **entry,
+            "items": tuple(items[:ANNOUNCEMENTS_PER_COURSE]),
+            "updated_at": time.time(),
+        }
+        return {
+            "courses": courses,
+            "auth_status": AUTHORIZED,
+            "auth_updated_at": time.time(),
+        }
+
+    await _update(user_id, change)
+
+
+async def mark_viewed(user_id):
+    await _run("mark a dashboard viewed", "mark_viewed", str(user_id))
+
+
+# Dashboards opened recently enough to be worth refreshing: (user id, view) pairs
+async def active_views():
+    return await _run(
+        "list active dashboards",
+        "viewed_since",
+        time.time() - DASHBOARD_ACTIVE_SECONDS,
+        default=[],
+    )
@@ -1,12 +1,16 @@
 import os
+import time
+import asyncio
 import logging
-import requests
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from dotenv import load_dotenv
+from bot.utils.logouts import logged_out_since, record_logout
+from bot.utils.snapshot import register_cache
+from bot.utils.token_backend import SingleFlight, token_backend
 import base64
 import json
 import datetime
@@ -14,8 +18,6 @@ import datetime
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Google API scopes and backend URL
@@ -26,78 +28,84 @@ SCOPES = [
 ]
 BACKEND_URL = os.getenv("BACKENDURL")
 
+# Token data from the backend per client id, so commands skip the backend round trip.
+# It holds refresh tokens and client secrets, so it is never written to a snapshot.
+# Entries are (cached at, token), so a logout in another process invalidates them.
+token_cache = register_cache(
+    "google_tokens",
+    ttl=float(os.getenv("TOKEN_CACHE_SECONDS", "600")),
+    persist=False,
+)
 
-# Load token from backend and convert it to Credentials Object
-def load_credentials(client_id):
-    try:
-        # Fetch token data from the backend
-        response = requests.get(
-            f"{BACKEND_URL}/classroom/check/", params={"clientid": client_id}
-        )
-        response.raise_for_status()  # Raise HTTPError for bad responses (4xx, 5xx)
-
-        # Parse the JSON response
-        data = response.json()
-
-        # Check if the response contains an error
-        if "error" in data:
-            logger.error(f"Error from backend: {data['error']}")
-            return None
 
-        # Extract the token from the response
-        token = data.get("token")
-        if not token:
-            logger.error(f"Token data not found for client id: {client_id}")
-            return None
+# Concurrent refreshes of the same user's credentials
+_refreshes = SingleFlight()
 
-        # Convert token to JSON and return Credentials object
-        token = json.loads(token)
-        creds = Credentials.from_authorized_user_info(token)
-        return creds
 
-    except requests.RequestException as e:
-        logger.error(f"Failed to load credentials: {e}")
-        return None
+# Load token from backend and convert it to Credentials Object ({"error": ...} if the
+# backend did not respond)
+async def load_credentials(client_id):
+    entry = token_cache.get(client_id)
+    if entry is not None and not await asyncio.to_thread(
+        logged_out_since, client_id, entry[0]
+    ):
+        token = entry[1]
+    else:
+        token = await token_backend.check(client_id)
+        if token is None or "error" in token:
+            return token
+        token_cache.set(client_id, (time.time(), token))
+    try:
+        return Credentials.from_authorized_user_info(token)
     except ValueError as e:
-        logger.error(f"Failed to parse token data: {e}")
+        logger.error("Failed to parse token data: %s", e)
         return None
 
 
-# Delete the token of a particular clientid
-def delete_token(client_id):
-    try:
-        response = requests.delete(
-            f"{BACKEND_URL}/classroom/unsubscribe", params={"clientid": client_id}
-        )
-        response.raise_for_status()  # Raise HTTPError for bad responses (4xx, 5xx)
-
-        # Parse the JSON response
-        data = response.json()
+# Load the tokens of many users into the cache with one bulk request (for pollers)
+async def prefetch_credentials(client_ids):
+    missing = [client_id for client_id in client_ids if not token_cache.get(client_id)]
+    if not missing:
+        return
+    tokens = await token_backend.check_many(missing)
+    for client_id, token in tokens.items():
+        if token is not None and "error" not in token:
+            token_cache.set(client_id, (time.time(), token))
 
-        # Check if the response contains an error
-        if "error" in data:
-            logger.error(f"Error from backend: {data['error']}")
-            return {"error": data["error"]}
 
-        # Return the success message
-        logger.info(f"Deleted token for client id: {client_id}")
-        return data
+# Delete the token of a particular clientid
+async def delete_token(client_id):
+    token_cache.delete(client_id)
+    res = await token_backend.unsubscribe(client_id)
+    if not (isinstance(res, dict) and "error" in res):
+        await asyncio.to_thread(record_logout, client_id)
+    return res
+
+
+# Refresh expired credentials in a thread (google-auth is blocking), once per user
+async def refresh_credentials(client_id, creds):
+    async def refresh():
+        await asyncio.to_thread(creds.refresh, Request())
+        token_cache.set(client_id, (time.time(), json.loads(creds.to_json())))
+        return creds
 
-    except requests.RequestException as e:
-        logger.error(f"Failed to delete token: {e}")
-        return {"error": f"Failed to delete token:{e.response.json()['error']}"}
+    return await _refreshes.run(client_id, refresh)
 
 
 # Get the credentials for a particular user if they exist, otherwise start the OAuth flow and return the auth URL
-def get_credentials(client_id):
-    creds = load_credentials(client_id)
-    if creds and creds.valid:
+async def get_credentials(client_id):
+    creds = await load_credentials(client_id)
+    # The backend did not respond: report it rather than ask for a new authorization
+    if isinstance(creds, dict):
+        return creds
+    # Expired credentials are not "valid" but can still be refreshed
+    if creds and (creds.valid or (creds.expired and creds.refresh_token)):
         if creds.expired and creds.refresh_token:
             logger.info("Refreshing expired credentials.")
             try:
-                creds.refresh(Request())
+                creds = await refresh_credentials(client_id, creds)
             except Exception as e:
-                logger.error(f"Failed to refresh credentials: {e}")
+                logger.error("Failed to refresh credentials: %s", e)
                 return {"error": "Failed to refresh credentials. Please reauthorize."}
         return creds
     else:
@@ -114,5 +122,5 @@ def get_credentials(client_id):
             json.dumps(state_data).encode()
         ).decode()
         auth_url, _ = flow.authorization_url(prompt="consent", state=encoded_state)
-        logger.info(f"Authorization URL generated for user {client_id}")
+        logger.info("Authorization URL generated for user %s", client_id)
         return {"auth_url": auth_url}
@@ -0,0 +1,117 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+import importlib
+from watchfiles import awatch, PythonFilter, Change
+from bot.utils.snapshot import save_snapshot
+from bot.utils.scrape_pool import shutdown_scrape_pool
+
+logger = logging.getLogger(__name__)
+
+# Project root (the directory containing main.py)
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Changes to these modules need a full restart (bot object, event handlers, server).
+# Most of bot.utils holds process-wide state (admission lanes, caches, the scrape pool,
+# the token backend's sessions, the logging listener) that other modules keep
+# references to, so reloading it in place would split that state in two. Stateless
+# helpers imported by modules that are never reloaded (bot.bot, other utils) need a
+# restart too: those modules would keep using the old functions.
+CORE_MODULES = ("main", "bot.bot", "bot.tasks", "bot.utils", "server")
+# Stateless helpers imported only by the cogs; reloaded in place before the cogs
+SHARED_MODULES = ("bot.utils.rendering",)
+
+# Milliseconds to group changes (editors often write a file several times)
+DEBOUNCE_MS = int(os.getenv("HOT_RELOAD_DEBOUNCE_MS", "300"))
+
+
+# Convert a file path into a dotted module name, e.g. bot/commands/greet.py -> bot.commands.greet
+def path_to_module(path: str):
+    rel_path = os.path.relpath(os.path.abspath(path), ROOT_DIR)
+    if rel_path.startswith("..") or not rel_path.endswith(".py"):
+        return None
+    module = rel_path[:-3].replace(os.sep, ".")
+    if module.endswith(".__init__"):
+        module = module[: -len(".__init__")]
+    return module
+
+
+def _in_package(module: str, packages) -> bool:
+    return any(module == pkg or module.startswith(pkg + ".") for pkg in packages)
+
+
+# Work out what has to happen for a set of changed modules
+def plan_reload(modules, loaded_extensions):
+    restart = False
+    shared = []
+    extensions = set()
+
+    for module in modules:
+        if module in loaded_extensions:
+            extensions.add(module)
+        elif module in SHARED_MODULES:
+            shared.append(module)
+            # Every cog may hold references to the shared helpers
+            extensions.update(loaded_extensions)
+        elif _in_package(module, CORE_MODULES):
+            restart = True
+
+    return restart, shared, sorted(extensions)
+
+
+# Replace the current process with a fresh one (same interpreter and arguments)
+def restart_process():
+    logger.info("Core module changed, restarting the bot process...")
+    save_snapshot()
+    shutdown_scrape_pool()
+    os.execv(sys.executable, [sys.executable] + sys.argv)
+
+
+async def reload_changes(bot, changes):
+    modules = {
+        module
+        for change, path in changes
+        if change != Change.deleted and (module := path_to_module(path))
+    }
+    restart, shared, extensions = plan_reload(modules, set(bot.extensions))
+
+    if restart:
+        restart_process()
+        return
+
+    start = time.perf_counter()
+    for module in shared:
+        if module in sys.modules:
+            importlib.reload(sys.modules[module])
+
+    for extension in extensions:
+        try:
+            await bot.reload_extension(extension)
+        except Exception as e:
+            logger.error("Failed to reload %s: %s", extension, e)
+            return
+
+    if shared or extensions:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.info(
+            "Reloaded %s in %.1f ms.", ", ".join(shared + extensions), elapsed_ms
+        )
+
+
+# Watch the project for .py changes and hot reload the affected cogs
+async def watch_and_reload(bot):
+    logger.info("Hot reload enabled, watching %s", ROOT_DIR)
+    async for changes in awatch(
+        ROOT_DIR, watch_filter=PythonFilter(), debounce=DEBOUNCE_MS
+    ):
+        try:
+            await reload_changes(bot, changes)
+        except Exception as e:
+            logger.error("Hot reload failed: %s", e)
+
+
+# Start the watcher as a task on the bot's event loop
+def start_hot_reload(bot) -> asyncio.Task:
+    return asyncio.create_task(watch_and_reload(bot))
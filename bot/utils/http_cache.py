@@ -0,0 +1,211 @@
+import os
+import time
+import pickle
+import sqlite3
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+from bot.utils.state import state_path
+
+logger = logging.getLogger(__name__)
+
+# Upper bound for the cached payloads on disk
+HTTP_CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+# Seconds to wait for another process' (e.g. a scrape worker's) write before giving up
+HTTP_CACHE_BUSY_TIMEOUT = float(os.getenv("HTTP_CACHE_BUSY_TIMEOUT", "1"))
+# Bumped when what the cache holds changes; older databases are emptied on open.
+# 2: only the library BookIssue page (version 1 also held users' Classroom data).
+SCHEMA_VERSION = 2
+
+
+# Validators and parsed result of an earlier response
+@dataclass
+class CacheEntry:
+    etag: str | None
+    last_modified: str | None
+    body_hash: str | None
+    body_size: int
+    payload: object
+
+
+def body_hash(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+# Key entries per identity without storing the identity (username, client id) itself
+def cache_key(identity: str, url: str) -> str:
+    return hashlib.sha256(f"{identity}\0{url}".encode()).hexdigest()
+
+
+# This process' counters, kept apart from the database so scrape workers can report
+# theirs even when the database could not be opened
+_stats = {
+    "not_modified": 0,  # 304 responses
+    "unchanged": 0,  # 200 responses with the same body hash
+    "misses": 0,
+    "bytes_saved": 0,  # Response bytes not downloaded thanks to 304s
+    "evictions": 0,
+}
+
+
+# Disk-backed, size-bounded store of response validators and parsed payloads, shared
+# by the bot and its scrape workers. It only saves work, so database errors (e.g. a
+# lock held past the busy timeout) are logged and treated as misses.
+class HttpCache:
+    def __init__(self, path: str, max_bytes: int = HTTP_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            path, timeout=HTTP_CACHE_BUSY_TIMEOUT, check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self._db.execute("DROP TABLE IF EXISTS entries")
+            self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, body_hash TEXT,"
+            " body_size INTEGER, payload BLOB, size INTEGER, accessed_at REAL)"
+        )
+        self._db.commit()
+        self.stats = _stats
+
+    def get(self, identity: str, url: str):
+        try:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT etag, last_modified, body_hash, body_size, payload"
+                    " FROM entries WHERE key = ?",
+                    (cache_key(identity, url),),
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.error("Failed to read the HTTP cache: %s", e)
+            return None
+        if row is None:
+            return None
+        try:
+            payload = pickle.loads(row[4])
+        except Exception as e:
+            logger.error("Dropping unreadable cache entry: %s", e)
+            self.delete(identity, url)
+            return None
+        return CacheEntry(row[0], row[1], row[2], row[3], payload)
+
+    def put(self, identity: str, url: str, entry: CacheEntry):
+        blob = pickle.dumps(entry.payload, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            self._write(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    cache_key(identity, url),
+                    entry.etag,
+                    entry.last_modified,
+                    entry.body_hash,
+                    entry.body_size,
+                    blob,
+                    len(blob),
+                    time.time(),
+                ),
+                evict=True,
+            )
+        except sqlite3.Error as e:
+            logger.error("Failed to write the HTTP cache: %s", e)
+
+    def delete(self, identity: str, url: str):
+        try:
+            self._write(
+                "DELETE FROM entries WHERE key = ?", (cache_key(identity, url),)
+            )
+        except sqlite3.Error as e:
+            logger.error("Failed to delete from the HTTP cache: %s", e)
+
+    # Run one write statement (and the eviction) in a transaction
+    def _write(self, sql: str, params, evict: bool = False):
+        with self._lock:
+            try:
+                self._db.execute(sql, params)
+                if evict:
+                    self._evict()
+                self._db.commit()
+            except sqlite3.Error:
+                self._db.rollback()
+                raise
+
+    # Record a 304 / unchanged response for an entry and return its payload
+    def hit(self, identity: str, url: str, entry: CacheEntry, not_modified: bool):
+        if not_modified:
+            self.stats["not_modified"] += 1
+            self.stats["bytes_saved"] += entry.body_size
+        else:
+            self.stats["unchanged"] += 1
+        try:
+            self._write(
+                "UPDATE entries SET accessed_at = ? WHERE key = ?",
+                (time.time(), cache_key(identity, url)),
+            )
+        except sqlite3.Error as e:
+            logger.error("Failed to update the HTTP cache: %s", e)
+        return entry.payload
+
+    def miss(self):
+        self.stats["misses"] += 1
+
+    # Drop least recently used entries until the cache fits in max_bytes
+    def _evict(self):
+        total = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._db.execute(
+            "SELECT key, size FROM entries ORDER BY accessed_at"
+        ).fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            self.stats["evictions"] += 1
+
+    def size(self) -> dict:
+        with self._lock:
+            count, total = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        return {"entries": count, "bytes": total, "max_bytes": self.max_bytes}
+
+
+_http_cache = None
+_http_cache_lock = threading.Lock()
+
+
+# The process-wide cache, opened on first use
+def get_http_cache() -> HttpCache:
+    global _http_cache
+    with _http_cache_lock:
+        if _http_cache is None:
+            _http_cache = HttpCache(state_path("http_cache.sqlite3"))
+    return _http_cache
+
+
+# Add the counters a scrape worker reported with its result
+def add_http_cache_stats(delta: dict):
+    for name, value in delta.items():
+        _stats[name] += value
+
+
+# Run func(*args) and also return how much it moved this process' counters
+def with_http_cache_stats(func, *args):
+    before = dict(_stats)
+    result = func(*args)
+    return result, {name: _stats[name] - before[name] for name in _stats}
+
+
+def http_cache_stats() -> dict:
+    try:
+        size = get_http_cache().size()
+    except sqlite3.Error as e:
+        logger.error("Failed to read the HTTP cache size: %s", e)
+        size = {}
+    return {**_stats, **size}
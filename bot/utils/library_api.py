@@ -1,90 +1,187 @@
+import os
+import sqlite3
+import hashlib
+import logging
 import requests
 from bs4 import BeautifulSoup
+from bot.utils.models import BookIssue
+from bot.utils.http_cache import CacheEntry, body_hash, get_http_cache
+from bot.utils.snapshot import register_cache
+
+logger = logging.getLogger(__name__)
+
+# Base URL of the e-library
+LIBRARY_URL = os.getenv("LIBRARY_URL", "http://pulchowk.elibrary.edu.np")
+# Connect and read timeouts for e-library requests, in seconds. Each request holds a
+# library admission slot, so a hung request must not hold it forever.
+LIBRARY_CONNECT_TIMEOUT = float(os.getenv("LIBRARY_CONNECT_TIMEOUT_SECONDS", "5"))
+LIBRARY_TIMEOUT = float(os.getenv("LIBRARY_TIMEOUT_SECONDS", "15"))
+
+# Logged in e-library sessions, reused until the (ASP.NET default) 20 minute timeout.
+# Live session cookies are not written to snapshots.
+session_cache = register_cache("library_sessions", ttl=20 * 60, persist=False)
 
 
 def login_and_get_cookie(username: str, password: str) -> str:
-    login_url = "http://pulchowk.elibrary.edu.np/Account/Login"
+    login_url = f"{LIBRARY_URL}/Account/Login"
     payload = {"Username": username, "Password": password}
 
     try:
         # Send POST request to login
-        response = requests.post(login_url, data=payload)
+        response = requests.post(
+            login_url, data=payload, timeout=(LIBRARY_CONNECT_TIMEOUT, LIBRARY_TIMEOUT)
+        )
 
         # Check if login was successful
         if response.status_code == 200:
-            print("Login successful!")
+            logger.info("Login successful!")
             # Extract the session cookie
             session_cookie = response.cookies.get("ASP.NET_SessionId")
             return session_cookie
         else:
-            print("Failed to login. Status code:", response.status_code)
+            logger.error("Failed to login. Status code: %s", response.status_code)
             return None
     except requests.exceptions.RequestException as e:
-        print(f"An error occurred during login: {e}")
+        logger.error("An error occurred during login: %s", e)
+        return None
+
+
+def _session_key(username: str, password: str):
+    return (username, hashlib.sha256(password.encode()).hexdigest())
+
+
+# Log in (or reuse a cached session) and fetch the user's books.
+# Returns (logged_in, books); books is None if the page could not be read.
+def fetch_books(username: str, password: str):
+    key = _session_key(username, password)
+    session_cookie = session_cache.get(key)
+    if session_cookie:
+        books = get_book_issue_info(session_cookie, identity=username)
+        if books is not None:
+            return True, books
+        # The session probably expired; log in again
+        session_cache.delete(key)
+
+    session_cookie = login_and_get_cookie(username, password)
+    if not session_cookie:
+        return False, None
+    session_cache.set(key, session_cookie)
+    return True, get_book_issue_info(session_cookie, identity=username)
+
+
+# Parse the BookIssue page into BookIssue models
+def parse_book_issue_page(html: str) -> list[BookIssue]:
+    soup = BeautifulSoup(html, "html.parser")
+
+    # Find the table
+    table = soup.find("table", {"class": "table table-striped"})
+    if not table:
+        logger.error("Table not found in the response.")
         return None
 
+    # Extract headers
+    headers = [th.text.strip() for th in table.find("thead").find_all("th")]
+
+    # Extract rows
+    rows = table.find("tbody").find_all("tr")
+
+    # Convert each row into a BookIssue
+    data = []
+    for row in rows:
+        cells = row.find_all("td")
+        row_data = {headers[i]: cell.text.strip() for i, cell in enumerate(cells)}
+        data.append(BookIssue.from_row(row_data))
+
+    return data
+
 
-def get_book_issue_info(session_cookie: str) -> list[dict]:
-    book_issue_url = "http://pulchowk.elibrary.edu.np/Book/BookIssue"
+# Get the books issued to the logged in user. With an identity (the library username)
+# the page is fetched conditionally and unchanged pages are not parsed again.
+def get_book_issue_info(session_cookie: str, identity: str = None) -> list[BookIssue]:
+    book_issue_url = f"{LIBRARY_URL}/Book/BookIssue"
 
     # Set up the cookie jar with the session cookie
     cookies = requests.cookies.RequestsCookieJar()
     cookies.set("ASP.NET_SessionId", session_cookie)
 
+    cache = None
+    if identity:
+        try:
+            cache = get_http_cache()
+        except sqlite3.Error as e:
+            logger.error("HTTP cache unavailable, fetching without it: %s", e)
+    entry = cache.get(identity, book_issue_url) if cache else None
+    headers = {}
+    if entry and entry.etag:
+        headers["If-None-Match"] = entry.etag
+    if entry and entry.last_modified:
+        headers["If-Modified-Since"] = entry.last_modified
+
     try:
         # Send GET request to book issue endpoint
-        response = requests.get(book_issue_url, cookies=cookies)
+        response = requests.get(
+            book_issue_url,
+            cookies=cookies,
+            headers=headers,
+            timeout=(LIBRARY_CONNECT_TIMEOUT, LIBRARY_TIMEOUT),
+        )
+
+        if response.status_code == 304 and entry:
+            logger.info("Book issue info not modified.")
+            return cache.hit(identity, book_issue_url, entry, not_modified=True)
 
         # Check if the request was successful
         if response.status_code == 200:
-            print("Book issue info retrieved successfully!")
-            # Parse the HTML response using BeautifulSoup
-            soup = BeautifulSoup(response.text, "html.parser")
-
-            # Find the table
-            table = soup.find("table", {"class": "table table-striped"})
-            if not table:
-                print("Table not found in the response.")
-                return None
-
-            # Extract headers
-            headers = [th.text.strip() for th in table.find("thead").find_all("th")]
-
-            # Extract rows
-            rows = table.find("tbody").find_all("tr")
-
-            # Convert rows into a list of dictionaries
-            data = []
-            for row in rows:
-                cells = row.find_all("td")
-                row_data = {
-                    headers[i]: cell.text.strip() for i, cell in enumerate(cells)
-                }
-                data.append(row_data)
-
-            return data
+            logger.info("Book issue info retrieved successfully!")
+            if not cache:
+                return parse_book_issue_page(response.text)
+
+            # Servers without validators: skip parsing if the page did not change
+            page_hash = body_hash(response.content)
+            if entry and entry.body_hash == page_hash:
+                return cache.hit(identity, book_issue_url, entry, not_modified=False)
+
+            cache.miss()
+            books = parse_book_issue_page(response.text)
+            if books is not None:
+                cache.put(
+                    identity,
+                    book_issue_url,
+                    CacheEntry(
+                        etag=response.headers.get("ETag"),
+                        last_modified=response.headers.get("Last-Modified"),
+                        body_hash=page_hash,
+                        body_size=len(response.content),
+                        payload=books,
+                    ),
+                )
+            return books
         else:
-            print(
-                "Failed to retrieve book issue info. Status code:", response.status_code
+            logger.error(
+                "Failed to retrieve book issue info. Status code: %s",
+                response.status_code,
             )
             return None
     except requests.exceptions.RequestException as e:
-        print(f"An error occurred while fetching book issue info: {e}")
+        logger.error("An error occurred while fetching book issue info: %s", e)
         return None
 
 
-def format_book_issue_data(book_issue_data: list[dict]) -> str:
-    if not book_issue_data:
-        return "No book issue data available."
-
-    formatted_message = "```Library Book Issue Information:\n\n"
-    for book in book_issue_data:
-        formatted_message += (
-            f"Accession No.: {book['Accession No.']}\n"
-            f"Title: {book['Title']}\n"
-            f"Issue Date: {book['Issue Date']}\n"
-            f"Return Date: {book['Return Date']}\n"
-            f"Over Due: {book['Over Due']}\n\n"
-        )
-    formatted_message += "```"
-    return formatted_message
+def _format_days(days_until_due) -> str:
+    if days_until_due is None:
+        return "Unknown"
+    if days_until_due < 0:
+        return f"Overdue by {-days_until_due} day(s)"
+    if days_until_due == 0:
+        return "Due today"
+    return f"Due in {days_until_due} day(s)"
+
+
+def format_book_issue(book: BookIssue) -> str:
+    return (
+        f"**{book.title}**\n"
+        f"Accession No.: {book.accession_no}\n"
+        f"Issue Date: {book.issue_date or 'Unknown'}\n"
+        f"Return Date: {book.return_date or 'Unknown'}\n"
+        f"Status: {_format_days(book.days_until_due)}"
+    )
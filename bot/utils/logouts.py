@@ -0,0 +1,78 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from bot.utils.state import state_path
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for another process' write before giving up
+LOGOUTS_BUSY_TIMEOUT = float(os.getenv("LOGOUTS_BUSY_TIMEOUT", "1"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS logouts (
+    user_id TEXT PRIMARY KEY,
+    logged_out_at REAL NOT NULL
+);
+"""
+
+
+# When each user last logged out, shared by every process: the token and course caches
+# are per process, so the others drop their entries cached before the logout
+class LogoutStore:
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            path,
+            timeout=LOGOUTS_BUSY_TIMEOUT,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+
+    def record(self, user_id: str):
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO logouts (user_id, logged_out_at) VALUES (?, ?)"
+                " ON CONFLICT (user_id) DO UPDATE SET"
+                " logged_out_at = excluded.logged_out_at",
+                (user_id, time.time()),
+            )
+
+    def logged_out_at(self, user_id: str):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT logged_out_at FROM logouts WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+
+_logout_store = None
+_logout_store_lock = threading.Lock()
+
+
+def get_logout_store() -> LogoutStore:
+    global _logout_store
+    with _logout_store_lock:
+        if _logout_store is None:
+            _logout_store = LogoutStore(state_path("logouts.sqlite3"))
+    return _logout_store
+
+
+def record_logout(user_id):
+    try:
+        get_logout_store().record(str(user_id))
+    except sqlite3.Error as e:
+        logger.error("Failed to record the logout of user %s: %s", user_id, e)
+
+
+# Whether the user logged out (in any process) after `cached_at`
+def logged_out_since(user_id, cached_at: float) -> bool:
+    try:
+        logged_out_at = get_logout_store().logged_out_at(str(user_id))
+    except sqlite3.Error as e:
+        logger.error("Failed to read the logout of user %s: %s", user_id, e)
+        return False
+    return logged_out_at is not None and logged_out_at >= cached_at
@@ -0,0 +1,128 @@
+import os
+import sys
+import tracemalloc
+import discord
+from bot.utils.snapshot import cache_sizes
+
+# "lean" keeps only what slash commands need; "full" is discord.py's default caching
+RUNTIME_PROFILE = os.getenv("RUNTIME_PROFILE", "lean")
+# Messages kept in the message cache (0 disables it)
+MAX_MESSAGES = int(os.getenv("MAX_MESSAGES", "0"))
+# Comma separated discord.MemberCacheFlags to enable, e.g. "voice" (empty caches none)
+MEMBER_CACHE_FLAGS = os.getenv("MEMBER_CACHE_FLAGS", "")
+# Frames kept per allocation when tracing; 0 leaves tracemalloc off
+TRACEMALLOC_FRAMES = int(os.getenv("TRACEMALLOC_FRAMES", "0"))
+
+# The bot whose discord.py caches are reported by memory_report()
+_client = None
+
+
+# Every command is a slash command, so the guilds intent is all the cogs need
+# (interactions and DMs sent by the bot are not gated by intents)
+def lean_intents() -> discord.Intents:
+    return discord.Intents(guilds=True)
+
+
+def member_cache_flags(names: str = MEMBER_CACHE_FLAGS) -> discord.MemberCacheFlags:
+    flags = discord.MemberCacheFlags.none()
+    for name in filter(None, (name.strip() for name in names.split(","))):
+        setattr(flags, name, True)
+    return flags
+
+
+# Keyword arguments for the discord client of the given runtime profile
+def client_options(profile: str = RUNTIME_PROFILE) -> dict:
+    if profile == "full":
+        intents = discord.Intents.default()
+        intents.message_content = True
+        return {"intents": intents}
+    if profile != "lean":
+        raise ValueError(f"Unknown runtime profile: {profile}")
+
+    return {
+        "intents": lean_intents(),
+        "max_messages": MAX_MESSAGES or None,
+        "member_cache_flags": member_cache_flags(),
+        # Members are never looked up, so don't request them for every guild on connect
+        "chunk_guilds_at_startup": False,
+    }
+
+
+def watch_client(client):
+    global _client
+    _client = client
+
+
+def start_tracing(frames: int = TRACEMALLOC_FRAMES):
+    if frames > 0 and not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+# Resident set size of this process in bytes (peak RSS where the current one is unknown)
+def rss_bytes():
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def discord_cache_sizes(client) -> dict:
+    state = client._connection
+    return {
+        "guilds": len(client.guilds),
+        "channels": sum(len(guild.channels) for guild in client.guilds),
+        "members": sum(len(guild.members) for guild in client.guilds),
+        "users": len(state._users),
+        "emojis": len(state._emojis),
+        "stickers": len(state._stickers),
+        "messages": len(state._messages) if state._messages is not None else 0,
+    }
+
+
+def top_allocations(limit: int = 10, group_by: str = "lineno"):
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        )
+    )
+    return [
+        {
+            "site": str(stat.traceback[0]),
+            "size_bytes": stat.size,
+            "count": stat.count,
+        }
+        for stat in snapshot.statistics(group_by)[:limit]
+    ]
+
+
+# Process memory, top allocation sites (when tracing, and limit > 0) and cache sizes
+def memory_report(limit: int = 10, group_by: str = "lineno") -> dict:
+    report = {
+        "rss_bytes": rss_bytes(),
+        "profile": RUNTIME_PROFILE,
+        "caches": cache_sizes(),
+        "discord": discord_cache_sizes(_client) if _client is not None else None,
+    }
+    if not tracemalloc.is_tracing():
+        report["tracemalloc"] = {
+            "error": "tracemalloc is off. Set TRACEMALLOC_FRAMES to enable it."
+        }
+        return report
+
+    current, peak = tracemalloc.get_traced_memory()
+    report["tracemalloc"] = {
+        "traced_bytes": current,
+        "traced_peak_bytes": peak,
+        "top": top_allocations(limit, group_by) if limit > 0 else [],
+    }
+    return report
@@ -0,0 +1,10 @@
+import math
+
+
+# Nearest-rank percentile of a list of numbers
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = max(0, min(len(values) - 1, math.ceil(pct / 100 * len(values)) - 1))
+    return values[index]
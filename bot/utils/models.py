@@ -0,0 +1,111 @@
+import datetime
+from dataclasses import dataclass
+from dateutil import parser
+
+# Date formats seen on the e-library pages, tried before the (slower) generic parser
+LIBRARY_DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%d/%m/%Y", "%m/%d/%Y %I:%M:%S %p")
+
+
+def parse_library_date(value: str):
+    value = value.strip()
+    if not value:
+        return None
+    for date_format in LIBRARY_DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    try:
+        return parser.parse(value).date()
+    except (ValueError, OverflowError):
+        return None
+
+
+# Parse Google's RFC 3339 timestamps, e.g. 2025-01-10T08:30:00.123Z
+def parse_google_time(value):
+    if not value:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+# A book issued to a library user, parsed once from a BookIssue table row
+@dataclass(frozen=True, slots=True)
+class BookIssue:
+    accession_no: str
+    title: str
+    issue_date: datetime.date | None
+    return_date: datetime.date | None
+    # Days left until the return date (negative once overdue), None if unknown
+    days_until_due: int | None
+
+    @classmethod
+    def from_row(cls, row: dict, today=None) -> "BookIssue":
+        return_date = parse_library_date(row.get("Return Date", ""))
+        try:
+            # The "Over Due" column is e.g. "-2 Days" (two days left) or "5 Days"
+            days_until_due = -int(row["Over Due"].split()[0])
+        except (KeyError, ValueError, IndexError):
+            days_until_due = None
+            if return_date:
+                today = today or datetime.date.today()
+                days_until_due = (return_date - today).days
+
+        return cls(
+            accession_no=row.get("Accession No.", ""),
+            title=row.get("Title", ""),
+            issue_date=parse_library_date(row.get("Issue Date", "")),
+            return_date=return_date,
+            days_until_due=days_until_due,
+        )
+
+
+# An announcement or coursework material from Google Classroom
+@dataclass(frozen=True, slots=True)
+class ClassroomItem:
+    id: str
+    course_id: str
+    kind: str  # "announcement" or "courseWorkMaterial"
+    text: str  # Announcement text or material title
+    description: str | None
+    materials: tuple
+    creation_time: datetime.datetime | None
+    update_time: datetime.datetime | None
+    alternate_link: str | None
+
+    @classmethod
+    def from_api(cls, kind: str, data: dict) -> "ClassroomItem":
+        if kind == "announcement":
+            text = data.get("text", "No content provided.")
+        else:
+            text = data.get("title", "No title provided.")
+
+        return cls(
+            id=data.get("id", ""),
+            course_id=data.get("courseId", ""),
+            kind=kind,
+            text=text,
+            description=data.get("description"),
+            materials=tuple(data.get("materials", ())),
+            creation_time=parse_google_time(data.get("creationTime")),
+            update_time=parse_google_time(data.get("updateTime")),
+            alternate_link=data.get("alternateLink"),
+        )
+
+    @property
+    def posted_date(self) -> str:
+        if self.creation_time is None:
+            return "Unknown"
+        return self.creation_time.strftime("%Y-%m-%d %H:%M:%S")
+
+
+# Select (owner, book) pairs due within the given number of days, in one pass
+def select_due_soon(books_by_owner: dict, within_days: int):
+    return [
+        (owner, book)
+        for owner, books in books_by_owner.items()
+        for book in books
+        if book.days_until_due is not None and 0 <= book.days_until_due <= within_days
+    ]
@@ -0,0 +1,188 @@
+import discord
+
+# Keep pages short enough to read on mobile (embed descriptions are capped at 4096)
+MAX_ITEMS_PER_PAGE = 5
+PAGE_CHAR_BUDGET = 3500
+EMBED_TITLE_LIMIT = 256
+# Pages sent as separate messages where buttons cannot work (the HTTP interactions
+# endpoint has no gateway connection to receive the clicks)
+MAX_UNPAGED_PAGES = 5
+
+
+# Shorten text to the given length, marking that it was cut
+def truncate(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    return text[: limit - 1] + "…"
+
+
+# Splits an iterable of items into embed pages, formatting items only when a page is requested
+class PageSource:
+    def __init__(self, items, render_item, title: str, separator: str = "\n\n"):
+        self._items = iter(items)
+        self._render_item = render_item
+        self._separator = separator
+        self._pending = None  # Rendered item that did not fit on the previous page
+        self._exhausted = False
+        self.title = title
+        self.pages = []  # Cached page descriptions
+
+    @property
+    def is_complete(self) -> bool:
+        return self._exhausted and self._pending is None
+
+    def _next_block(self):
+        if self._pending is not None:
+            block, self._pending = self._pending, None
+            return block
+        try:
+            item = next(self._items)
+        except StopIteration:
+            self._exhausted = True
+            return None
+        return truncate(self._render_item(item), PAGE_CHAR_BUDGET)
+
+    # Render the next page and add it to the cache
+    def _build_page(self) -> bool:
+        blocks = []
+        size = 0
+        while len(blocks) < MAX_ITEMS_PER_PAGE:
+            block = self._next_block()
+            if block is None:
+                break
+            added = len(block) + (len(self._separator) if blocks else 0)
+            if blocks and size + added > PAGE_CHAR_BUDGET:
+                self._pending = block
+                break
+            blocks.append(block)
+            size += added
+
+        if not blocks:
+            return False
+        self.pages.append(self._separator.join(blocks))
+        # Peek so we know whether a next page exists
+        if self._pending is None and not self._exhausted:
+            self._pending = self._next_block()
+        return True
+
+    # Get the page at index, rendering pages up to it if needed
+    def get_page(self, index: int):
+        while index >= len(self.pages) and not self.is_complete:
+            if not self._build_page():
+                break
+        if index < len(self.pages):
+            return self.pages[index]
+        return None
+
+    def has_page(self, index: int) -> bool:
+        if index < len(self.pages):
+            return True
+        # The page after the last rendered one exists if an item was peeked for it
+        if index == len(self.pages):
+            return self._pending is not None
+        return not self.is_complete and self.get_page(index) is not None
+
+    def embed(self, index: int) -> discord.Embed:
+        embed = discord.Embed(
+            title=truncate(self.title, EMBED_TITLE_LIMIT),
+            description=self.get_page(index),
+            color=discord.Color.blurple(),
+        )
+        total = f" of {len(self.pages)}" if self.is_complete else ""
+        embed.set_footer(text=f"Page {index + 1}{total}")
+        return embed
+
+
+# Next/previous buttons for a PageSource, bound to the user who ran the command
+class Paginator(discord.ui.View):
+    def __init__(self, source: PageSource, owner_id: int, timeout: float = 180):
+        super().__init__(timeout=timeout)
+        self.source = source
+        self.owner_id = owner_id
+        self.index = 0
+        self.message = None
+        self._update_buttons()
+
+    def _update_buttons(self):
+        self.previous_page.disabled = self.index == 0
+        self.next_page.disabled = not self.source.has_page(self.index + 1)
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message(
+                "Only the user who ran the command can change pages.", ephemeral=True
+            )
+            return False
+        return True
+
+    async def _show(self, interaction: discord.Interaction):
+        self._update_buttons()
+        await interaction.response.edit_message(
+            embed=self.source.embed(self.index), view=self
+        )
+
+    @discord.ui.button(label="◀ Prev", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button):
+        self.index = max(self.index - 1, 0)
+        await self._show(interaction)
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button):
+        if self.source.has_page(self.index + 1):
+            self.index += 1
+        await self._show(interaction)
+
+    async def on_timeout(self):
+        # Remove the buttons once nobody can use them anymore
+        if self.message is not None:
+            try:
+                await self.message.edit(view=None)
+            except discord.HTTPException:
+                pass
+
+
+# Send items as paginated embeds; only the first page is formatted up front
+async def send_paginated(
+    interaction: discord.Interaction,
+    items,
+    render_item,
+    title: str,
+    empty_message: str,
+    separator: str = "\n\n",
+):
+    source = PageSource(items, render_item, title, separator)
+    if source.get_page(0) is None:
+        await _send(interaction, content=empty_message)
+        return
+
+    if not source.has_page(1):
+        await _send(interaction, embed=source.embed(0))
+        return
+
+    if not getattr(interaction, "supports_views", True):
+        await _send_pages(interaction, source)
+        return
+
+    view = Paginator(source, interaction.user.id)
+    view.message = await _send(interaction, embed=source.embed(0), view=view)
+
+
+# Send the first pages as one message each, noting when there are more
+async def _send_pages(interaction: discord.Interaction, source: PageSource):
+    for index in range(MAX_UNPAGED_PAGES):
+        if source.get_page(index) is None:
+            return
+        await _send(interaction, embed=source.embed(index))
+    if source.has_page(MAX_UNPAGED_PAGES):
+        await _send(
+            interaction,
+            content=f"Showing the first {MAX_UNPAGED_PAGES} pages only.",
+        )
+
+
+# Send using the follow-up webhook if the response was already deferred
+async def _send(interaction: discord.Interaction, **kwargs):
+    if interaction.response.is_done():
+        return await interaction.followup.send(wait=True, **kwargs)
+    await interaction.response.send_message(**kwargs)
+    return await interaction.original_response()
@@ -0,0 +1,118 @@
+import os
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from bot.utils.admission import lanes
+from bot.utils.http_cache import add_http_cache_stats
+from bot.utils.library_api import fetch_books
+from bot.utils.scrape_worker import init_worker, scrape_books
+
+logger = logging.getLogger(__name__)
+
+# Worker processes for bulk library scraping; 0 scrapes in a thread of the bot process
+SCRAPE_WORKERS = int(os.getenv("SCRAPE_WORKERS", "2"))
+# Replace the workers after about this many scrapes each to cap their memory
+SCRAPE_TASKS_PER_WORKER = int(os.getenv("SCRAPE_TASKS_PER_WORKER", "200"))
+# Scrapes submitted to the pool at once; the rest wait in the bot process
+SCRAPE_MAX_IN_FLIGHT = int(
+    os.getenv("SCRAPE_MAX_IN_FLIGHT", str(max(SCRAPE_WORKERS, 1) * 2))
+)
+
+
+# Long-lived worker processes doing the CPU heavy scraping (BeautifulSoup parsing)
+# off the event loop's process, so a large sweep does not starve the gateway heartbeat
+class ScrapePool:
+    def __init__(self, workers: int, tasks_per_worker: int, max_in_flight: int):
+        self.workers = workers
+        self.tasks_per_worker = tasks_per_worker
+        self.max_in_flight = max_in_flight
+        self._executor = None
+        self._executor_tasks = 0
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.recycled = 0
+
+    # The pool is recycled as a whole: once it ran tasks_per_worker scrapes per worker,
+    # new work goes to a fresh pool and the old one exits after finishing its tasks.
+    # (ProcessPoolExecutor's own max_tasks_per_child can deadlock on Python 3.11.)
+    def _get_executor(self):
+        if (
+            self._executor is not None
+            and self._executor_tasks >= self.workers * self.tasks_per_worker
+        ):
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            self.recycled += 1
+
+        if self._executor is None:
+            # Spawned, not forked: the bot process runs threads (logging, FastAPI)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+            )
+            self._executor_tasks = 0
+        self._executor_tasks += 1
+        return self._executor
+
+    async def run(self, func, *args):
+        async with self._in_flight:
+            self.submitted += 1
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self._get_executor(), func, *args
+                )
+            except BrokenProcessPool:
+                # A worker died (e.g. killed for memory); start a new pool next time
+                logger.error("Scrape worker pool broke, restarting it.")
+                self.failed += 1
+                self.shutdown()
+                raise
+            except Exception:
+                self.failed += 1
+                raise
+            self.completed += 1
+            return result
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "tasks_per_worker": self.tasks_per_worker,
+            "max_in_flight": self.max_in_flight,
+            "running": self._executor is not None,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "recycled": self.recycled,
+        }
+
+
+scrape_pool = ScrapePool(SCRAPE_WORKERS, SCRAPE_TASKS_PER_WORKER, SCRAPE_MAX_IN_FLIGHT)
+
+
+# Fetch a user's books for a bulk sweep: in a worker process once the library has a
+# free slot, or in a thread when SCRAPE_WORKERS is 0
+async def scrape_user_books(username: str, password: str):
+    async with lanes["library"].slot():
+        if scrape_pool.workers == 0:
+            return await asyncio.to_thread(fetch_books, username, password)
+        result, cache_stats = await scrape_pool.run(scrape_books, username, password)
+        add_http_cache_stats(cache_stats)
+        return result
+
+
+def scrape_pool_stats() -> dict:
+    return scrape_pool.stats()
+
+
+def shutdown_scrape_pool():
+    scrape_pool.shutdown()
@@ -0,0 +1,17 @@
+# Code run inside the scrape pool's worker processes. Spawned workers import this
+# module (and main.py as __mp_main__), so it must stay light: no discord, no
+# admission control, nothing that starts the bot.
+from bot.utils.http_cache import with_http_cache_stats
+from bot.utils.library_api import fetch_books
+from bot.utils.logging_setup import setup_logging
+
+
+def init_worker():
+    setup_logging()
+
+
+# Log in, fetch and parse one user's books inside a worker process.
+# Only the (logged_in, books) tuple of small BookIssue models travels back, with the
+# worker's HTTP cache counters for this scrape so the bot's metrics include them.
+def scrape_books(username: str, password: str):
+    return with_http_cache_stats(fetch_books, username, password)
@@ -0,0 +1,154 @@
+import sqlite3
+import logging
+import threading
+from bot.utils.state import state_path
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    course_id TEXT,
+    kind TEXT,
+    update_time TEXT,
+    posted TEXT,
+    link TEXT,
+    UNIQUE (user_id, item_id)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+    title, body, materials, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+# Searchable text of an item's attachments (titles and links)
+def _materials_text(materials) -> str:
+    parts = []
+    for material in materials:
+        for kind in ("driveFile", "youtubeVideo", "link", "form"):
+            if kind not in material:
+                continue
+            data = material[kind]
+            if kind == "driveFile":
+                data = {**data.get("driveFile", {}), **data}
+            parts.append(data.get("title", ""))
+            parts.append(data.get("url") or data.get("alternateLink") or "")
+            parts.append(data.get("formUrl", ""))
+    return " ".join(part for part in parts if part)
+
+
+# Turn user input into an FTS5 query: every word must match, the last one as a prefix
+def build_match_query(query: str):
+    terms = ['"' + term.replace('"', '""') + '"' for term in query.split()]
+    if not terms:
+        return None
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+# Full-text index of the announcements and materials each user has fetched
+class SearchIndex:
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+
+    # Add or update items; items whose updateTime did not change are skipped
+    def index_items(self, user_id: str, items) -> int:
+        changed = 0
+        with self._lock:
+            for item in items:
+                update_time = item.update_time.isoformat() if item.update_time else ""
+                row = self._db.execute(
+                    "SELECT id, update_time FROM items WHERE user_id = ? AND item_id = ?",
+                    (user_id, item.id),
+                ).fetchone()
+                if row and row[1] == update_time:
+                    continue
+
+                if row:
+                    self._db.execute("DELETE FROM items_fts WHERE rowid = ?", (row[0],))
+                    self._db.execute("DELETE FROM items WHERE id = ?", (row[0],))
+                cursor = self._db.execute(
+                    "INSERT INTO items (user_id, item_id, course_id, kind, update_time, posted, link)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        user_id,
+                        item.id,
+                        item.course_id,
+                        item.kind,
+                        update_time,
+                        item.posted_date,
+                        item.alternate_link,
+                    ),
+                )
+                # Announcements only have text; materials have a title and description
+                if item.kind == "announcement":
+                    title, body = "", item.text
+                else:
+                    title, body = item.text, item.description or ""
+                self._db.execute(
+                    "INSERT INTO items_fts (rowid, title, body, materials) VALUES (?, ?, ?, ?)",
+                    (cursor.lastrowid, title, body, _materials_text(item.materials)),
+                )
+                changed += 1
+            self._db.commit()
+        if changed:
+            logger.debug("Indexed %d item(s) for user %s", changed, user_id)
+        return changed
+
+    def search(self, user_id: str, query: str, limit: int = 25):
+        match = build_match_query(query)
+        if match is None:
+            return []
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT items.course_id, items.kind, items.posted, items.link,"
+                " snippet(items_fts, -1, '**', '**', '…', 16)"
+                " FROM items_fts JOIN items ON items.id = items_fts.rowid"
+                " WHERE items_fts MATCH ? AND items.user_id = ?"
+                " ORDER BY rank LIMIT ?",
+                (match, user_id, limit),
+            ).fetchall()
+        return [
+            {
+                "course_id": course_id,
+                "kind": kind,
+                "posted_date": posted,
+                "link": link,
+                "snippet": snippet,
+            }
+            for course_id, kind, posted, link, snippet in rows
+        ]
+
+    # Forget everything indexed for a user (e.g. on logout)
+    def remove_user(self, user_id: str) -> int:
+        with self._lock:
+            ids = [
+                row[0]
+                for row in self._db.execute(
+                    "SELECT id FROM items WHERE user_id = ?", (user_id,)
+                )
+            ]
+            self._db.executemany(
+                "DELETE FROM items_fts WHERE rowid = ?", [(i,) for i in ids]
+            )
+            self._db.execute("DELETE FROM items WHERE user_id = ?", (user_id,))
+            self._db.commit()
+        return len(ids)
+
+
+_search_index = None
+_search_index_lock = threading.Lock()
+
+
+# The process-wide index, opened on first use
+def get_search_index() -> SearchIndex:
+    global _search_index
+    with _search_index_lock:
+        if _search_index is None:
+            _search_index = SearchIndex(state_path("search_index.sqlite3"))
+    return _search_index
@@ -0,0 +1,140 @@
+import os
+import glob
+import json
+import time
+import logging
+from discord.ext import commands
+from bot.utils.state import STATE_DIR, state_path
+
+logger = logging.getLogger(__name__)
+
+# Set by the supervisor for each bot process; unset means a single unsharded process
+SHARD_COUNT = os.getenv("SHARD_COUNT")
+SHARD_IDS = os.getenv("SHARD_IDS")  # e.g. "0,1,2,3"
+PROCESS_INDEX = int(os.getenv("PROCESS_INDEX", "0"))
+
+LEADER_FILE = "leader.json"
+# Seconds to trust a cached leader lookup
+LEADER_CACHE_SECONDS = 5
+
+_leader_cache = (0.0, None)
+
+
+# Split shard IDs 0..shard_count-1 into contiguous ranges, one per process
+def shard_ranges(shard_count: int, processes: int):
+    base, extra = divmod(shard_count, processes)
+    ranges, start = [], 0
+    for index in range(processes):
+        size = base + (1 if index < extra else 0)
+        ranges.append(list(range(start, start + size)))
+        start += size
+    return [shard_ids for shard_ids in ranges if shard_ids]
+
+
+# Create an AutoShardedBot for the configured shards, or a plain Bot if unsharded
+def create_bot(**kwargs):
+    if not SHARD_COUNT:
+        return commands.Bot(**kwargs)
+
+    shard_ids = (
+        [int(shard_id) for shard_id in SHARD_IDS.split(",")] if SHARD_IDS else None
+    )
+    logger.info("Running shards %s of %s", shard_ids or "all", SHARD_COUNT)
+    return commands.AutoShardedBot(
+        shard_count=int(SHARD_COUNT), shard_ids=shard_ids, **kwargs
+    )
+
+
+def write_leader(process_index: int):
+    path = state_path(LEADER_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump({"process_index": process_index, "elected_at": time.time()}, f)
+    os.replace(path + ".tmp", path)
+
+
+def read_leader():
+    try:
+        with open(state_path(LEADER_FILE), "r") as f:
+            return json.load(f)["process_index"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+# Whether this process should run background jobs (due date sweep, pollers)
+def is_leader() -> bool:
+    global _leader_cache
+    checked_at, leader = _leader_cache
+    if time.monotonic() - checked_at > LEADER_CACHE_SECONDS:
+        leader = read_leader() if SHARD_COUNT else None
+        _leader_cache = (time.monotonic(), leader)
+    # Until a leader is elected (or without a supervisor) the first process leads
+    if leader is None:
+        return PROCESS_INDEX == 0
+    return leader == PROCESS_INDEX
+
+
+def _health_file(process_index: int) -> str:
+    return state_path(f"shard-health-{process_index}.json")
+
+
+# Write this process' per-shard health for the supervisor and /health/shards
+def write_health(bot, metrics: dict = None):
+    if getattr(bot, "shards", None):
+        shards = {
+            shard_id: {
+                "latency_ms": round(shard.latency * 1000, 1),
+                "closed": shard.is_closed(),
+                "ratelimited": shard.is_ws_ratelimited(),
+            }
+            for shard_id, shard in bot.shards.items()
+        }
+    else:
+        shards = {
+            0: {"latency_ms": round(bot.latency * 1000, 1), "closed": bot.is_closed()}
+        }
+
+    health = {
+        "process_index": PROCESS_INDEX,
+        "pid": os.getpid(),
+        "ready": bot.is_ready(),
+        "leader": is_leader(),
+        "guilds": len(bot.guilds),
+        "shards": shards,
+        # This process' admission, cache and memory numbers, for the supervisor's
+        # HTTP server (the bot processes it runs serve no HTTP themselves)
+        "metrics": metrics or {},
+        "updated_at": time.time(),
+    }
+    path = _health_file(PROCESS_INDEX)
+    with open(path + ".tmp", "w") as f:
+        json.dump(health, f)
+    os.replace(path + ".tmp", path)
+
+
+def read_health(process_index: int):
+    try:
+        with open(_health_file(process_index), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# Health reports of processes 0..process_count-1, with the ones that have not written
+# a report (crashed before their first one, or not started yet) reported as down.
+# Without a count, every process that has written a report.
+def read_all_health(process_count: int = None):
+    if process_count is None:
+        paths = glob.glob(os.path.join(STATE_DIR, "shard-health-*.json"))
+        indexes = sorted(
+            int(os.path.basename(path)[len("shard-health-") : -len(".json")])
+            for path in paths
+        )
+    else:
+        indexes = range(process_count)
+    reports = []
+    for index in indexes:
+        health = read_health(index)
+        if health is None:
+            health = {"process_index": index, "ready": False, "down": True}
+        reports.append(health)
+    return reports
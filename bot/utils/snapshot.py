@@ -0,0 +1,189 @@
+import os
+import time
+import pickle
+import logging
+import tempfile
+import threading
+from bot.utils.state import STATE_DIR, state_path
+
+logger = logging.getLogger(__name__)
+
+# Bump when the snapshot file layout changes; older files are ignored
+SNAPSHOT_VERSION = 1
+# One snapshot per bot process (PROCESS_INDEX is set by the shard supervisor), so
+# shard processes never overwrite each other's caches
+SNAPSHOT_FILE = f"snapshot-{int(os.getenv('PROCESS_INDEX', '0'))}.pickle"
+# Written by earlier versions, with the users' tokens in it; removed on load
+LEGACY_SNAPSHOT_FILE = "snapshot.pickle"
+# Minutes between periodic snapshots
+SNAPSHOT_INTERVAL_MINUTES = float(os.getenv("SNAPSHOT_INTERVAL_MINUTES", "10"))
+
+_caches = {}
+_pending = {}  # Cache name -> dumped entries not restored yet
+
+
+# In-memory cache with per-entry expiry that survives restarts through snapshots.
+# Expiry times are wall-clock timestamps so they stay meaningful in a new process.
+# Caches holding secrets (tokens, session cookies) pass persist=False and stay in memory.
+class SnapshotCache:
+    def __init__(
+        self,
+        name: str,
+        ttl: float,
+        version: int = 1,
+        maxsize: int = 10000,
+        persist: bool = True,
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.version = version  # Bump when the cached values change shape
+        self.maxsize = maxsize
+        self.persist = persist
+        self._entries = {}  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self._restored = False
+
+    # Load this cache's entries from the startup snapshot on first use
+    def _restore(self):
+        self._restored = True
+        dump = _pending.pop(self.name, None)
+        if not dump or dump["version"] != self.version:
+            return
+        now = time.time()
+        restored = 0
+        for key, value, expires_at in dump["entries"]:
+            if expires_at > now and key not in self._entries:
+                self._entries[key] = (value, expires_at)
+                restored += 1
+        logger.info("Restored %d entries into cache %s", restored, self.name)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if not self._restored:
+                self._restore()
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            if entry[1] <= time.time():
+                del self._entries[key]
+                return default
+            return entry[0]
+
+    def set(self, key, value, ttl: float = None):
+        with self._lock:
+            if not self._restored:
+                self._restore()
+            if len(self._entries) >= self.maxsize and key not in self._entries:
+                # Drop the entry closest to expiring
+                oldest = min(self._entries, key=lambda k: self._entries[k][1])
+                del self._entries[oldest]
+            self._entries[key] = (value, time.time() + (ttl or self.ttl))
+
+    def delete(self, key):
+        with self._lock:
+            if not self._restored:
+                self._restore()
+            self._entries.pop(key, None)
+
+    # Unexpired (key, value) pairs
+    def items(self):
+        with self._lock:
+            if not self._restored:
+                self._restore()
+            now = time.time()
+            return [
+                (key, value)
+                for key, (value, expires_at) in self._entries.items()
+                if expires_at > now
+            ]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def dump(self) -> dict:
+        with self._lock:
+            if not self._restored:
+                self._restore()
+            now = time.time()
+            return {
+                "version": self.version,
+                "entries": [
+                    (key, value, expires_at)
+                    for key, (value, expires_at) in self._entries.items()
+                    if expires_at > now
+                ],
+            }
+
+
+# Create (or get) a named cache that is included in snapshots
+def register_cache(name: str, ttl: float, version: int = 1, **kwargs) -> SnapshotCache:
+    if name not in _caches:
+        _caches[name] = SnapshotCache(name, ttl, version, **kwargs)
+    return _caches[name]
+
+
+def cache_sizes() -> dict:
+    return {name: len(cache) for name, cache in _caches.items()}
+
+
+# Write every persisted cache to this process' snapshot file, readable by its owner only
+def save_snapshot():
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "saved_at": time.time(),
+        "caches": {
+            name: cache.dump() for name, cache in _caches.items() if cache.persist
+        },
+    }
+    path = state_path(SNAPSHOT_FILE)
+    # A unique temporary file (created 0600), so concurrent saves never share one
+    fd, tmp_path = tempfile.mkstemp(dir=STATE_DIR, prefix=SNAPSHOT_FILE, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    entries = sum(len(dump["entries"]) for dump in snapshot["caches"].values())
+    logger.info("Saved snapshot with %d cache entries", entries)
+
+
+# Unpickling runs code, so only trust a file this user owns that nobody else can write
+def _is_private(f) -> bool:
+    if not hasattr(os, "getuid"):  # Windows: no POSIX owner or mode bits
+        return True
+    stat = os.fstat(f.fileno())
+    return stat.st_uid == os.getuid() and not stat.st_mode & 0o022
+
+
+# Read the snapshot file; each cache restores its own entries when first used
+def load_snapshot() -> bool:
+    try:
+        os.remove(state_path(LEGACY_SNAPSHOT_FILE))
+        logger.info("Removed the legacy snapshot file")
+    except FileNotFoundError:
+        pass
+
+    try:
+        with open(state_path(SNAPSHOT_FILE), "rb") as f:
+            if not _is_private(f):
+                logger.error("Ignoring snapshot writable by other users")
+                return False
+            snapshot = pickle.load(f)
+    except FileNotFoundError:
+        return False
+    except Exception as e:
+        logger.error("Ignoring unreadable snapshot: %s", e)
+        return False
+
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        logger.info("Ignoring snapshot with version %s", snapshot.get("version"))
+        return False
+
+    _pending.update(snapshot["caches"])
+    for cache in _caches.values():
+        cache._restored = False
+    age = time.time() - snapshot["saved_at"]
+    logger.info("Loaded snapshot from %.0f seconds ago", age)
+    return True
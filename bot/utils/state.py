@@ -0,0 +1,11 @@
+import os
+
+# Directory for files the bot keeps between runs (sync fingerprints, caches, ...)
+STATE_DIR = os.getenv("STATE_DIR", ".state")
+
+
+# Get the path of a file inside the state directory, creating the directory (private to
+# this user) if needed
+def state_path(name: str) -> str:
+    os.makedirs(STATE_DIR, mode=0o700, exist_ok=True)
+    return os.path.join(STATE_DIR, name)
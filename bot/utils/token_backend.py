@@ -0,0 +1,176 @@
+import os
+import json
+import asyncio
+import logging
+import weakref
+import aiohttp
+from bot.utils.admission import lanes
+
+logger = logging.getLogger(__name__)
+
+# The backend storing users' Google tokens
+BACKEND_URL = os.getenv("BACKENDURL")
+# Whole-request and connect timeouts for token backend calls, in seconds
+BACKEND_TIMEOUT = float(os.getenv("BACKEND_TIMEOUT_SECONDS", "5"))
+BACKEND_CONNECT_TIMEOUT = float(os.getenv("BACKEND_CONNECT_TIMEOUT_SECONDS", "2"))
+# Client ids per bulk check request
+BULK_CHECK_SIZE = 100
+
+
+# Concurrent calls with the same key share one run of the call
+class SingleFlight:
+    def __init__(self):
+        self._inflight = {}  # (event loop, key) -> task
+
+    async def run(self, key, factory):
+        key = (asyncio.get_running_loop(), key)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded so one caller giving up does not cancel the others' call
+        return await asyncio.shield(task)
+
+
+# Async client for the token backend: a pooled session per event loop (the bot's and
+# the HTTP server's), strict timeouts, and single-flight calls per client id
+class TokenBackend:
+    def __init__(self):
+        self._sessions = weakref.WeakKeyDictionary()  # event loop -> session
+        self._single_flight = SingleFlight()
+        # Cleared once the backend answers the bulk endpoint with 404/405
+        self.bulk_supported = True
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(
+                    total=BACKEND_TIMEOUT, connect=BACKEND_CONNECT_TIMEOUT
+                ),
+                connector=aiohttp.TCPConnector(limit=lanes["backend"].limit),
+            )
+            self._sessions[loop] = session
+        return session
+
+    async def _request(self, method: str, path: str, **kwargs):
+        async with lanes["backend"].slot():
+            async with self._get_session().request(
+                method, f"{BACKEND_URL}{path}", **kwargs
+            ) as response:
+                try:
+                    data = await response.json(content_type=None)
+                except ValueError:
+                    data = None
+                return response.status, data
+
+    # Token data (dict) of a client id, None if it has none, or {"error": ...} if the
+    # backend did not respond (so callers do not send the user to authorize again)
+    async def check(self, client_id: str):
+        return await self._single_flight.run(
+            ("check", client_id), lambda: self._check(client_id)
+        )
+
+    async def _check(self, client_id: str):
+        try:
+            status, data = await self._request(
+                "GET", "/classroom/check/", params={"clientid": client_id}
+            )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error("Failed to load credentials: %r", e)
+            return {"error": "Failed to load credentials: the backend did not respond."}
+
+        if status >= 400 or not isinstance(data, dict):
+            logger.error("Token backend returned status %s", status)
+            return None
+        if "error" in data:
+            logger.error("Error from backend: %s", data["error"])
+            return None
+        if not data.get("token"):
+            logger.error("Token data not found for client id: %s", client_id)
+            return None
+        try:
+            return json.loads(data["token"])
+        except ValueError as e:
+            logger.error("Failed to parse token data: %s", e)
+            return None
+
+    # Token data of many client ids in a few bulk requests: {client id: what check()
+    # returns}.
+    # Falls back to one (deduplicated) check per client id if the backend has no bulk API.
+    async def check_many(self, client_ids) -> dict:
+        client_ids = list(dict.fromkeys(client_ids))
+        tokens = {}
+        for start in range(0, len(client_ids), BULK_CHECK_SIZE):
+            chunk = client_ids[start : start + BULK_CHECK_SIZE]
+            found = await self._check_bulk(chunk) if self.bulk_supported else None
+            if found is None:
+                found = dict(
+                    zip(
+                        chunk,
+                        await asyncio.gather(*(self.check(cid) for cid in chunk)),
+                    )
+                )
+            tokens.update(found)
+        return tokens
+
+    async def _check_bulk(self, client_ids):
+        try:
+            status, data = await self._request(
+                "POST", "/classroom/check/bulk", json={"clientids": client_ids}
+            )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error("Bulk token check failed: %r", e)
+            return None
+
+        if status in (404, 405):
+            logger.info("Token backend has no bulk check, checking one by one.")
+            self.bulk_supported = False
+            return None
+        if status >= 400 or not isinstance(data, dict):
+            logger.error("Bulk token check returned status %s", status)
+            return None
+
+        tokens = {}
+        for client_id in client_ids:
+            token = data.get("tokens", {}).get(client_id)
+            try:
+                tokens[client_id] = json.loads(token) if token else None
+            except ValueError as e:
+                logger.error("Failed to parse token data of %s: %s", client_id, e)
+                tokens[client_id] = None
+        return tokens
+
+    # Remove a client id's token; returns the backend's reply or {"error": ...}
+    async def unsubscribe(self, client_id: str) -> dict:
+        return await self._single_flight.run(
+            ("unsubscribe", client_id), lambda: self._unsubscribe(client_id)
+        )
+
+    async def _unsubscribe(self, client_id: str) -> dict:
+        try:
+            status, data = await self._request(
+                "DELETE", "/classroom/unsubscribe", params={"clientid": client_id}
+            )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error("Failed to delete token: %r", e)
+            return {"error": "Failed to delete token: the backend did not respond."}
+
+        error = data.get("error") if isinstance(data, dict) else None
+        if status >= 400 or error:
+            logger.error("Error from backend (status %s): %s", status, error)
+            return {"error": f"Failed to delete token: {error or f'status {status}'}"}
+
+        logger.info("Deleted token for client id: %s", client_id)
+        return data
+
+    # Close the session of the running event loop
+    async def close(self):
+        session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None and not session.closed:
+            await session.close()
+
+
+token_backend = TokenBackend()
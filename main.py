@@ -1,37 +1,75 @@
-from bot.bot import bot, load_extensions
 import os
-from dotenv import load_dotenv
+import signal
 import asyncio
 import threading
-import uvicorn
+from dotenv import load_dotenv
+
+# Load environment variables (before importing the bot, which reads its settings)
+load_dotenv()
 
-# To keep the bot alive since I am hosting it in the render haha
-from server.main import app
+# The bot, the server and their dependencies are imported inside the functions below:
+# the scrape pool's spawned workers re-import this module (as __mp_main__) and must
+# not load any of them.
 
 
 def run_fastapi():
     """Run the FastAPI server on port 8000."""
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+    import uvicorn
 
+    # To keep the bot alive since I am hosting it in the render haha
+    from server.main import app
 
-# Load environment variables
-load_dotenv()
+    uvicorn.run(app, host="0.0.0.0", port=8001)
 
 
 async def main():
+    from bot.bot import bot, load_extensions
+    from bot.utils.snapshot import load_snapshot, save_snapshot
+    from bot.utils.scrape_pool import shutdown_scrape_pool
+    from bot.utils.token_backend import token_backend
+
+    # Restore the caches saved by the previous process
+    load_snapshot()
+
     # Load the extensions (cogs)
     await load_extensions()
 
+    # Reload changed cogs in place while developing (DEV_MODE=1)
+    if os.getenv("DEV_MODE") == "1":
+        from bot.utils.hot_reload import start_hot_reload
+
+        hot_reload_task = start_hot_reload(bot)
+
+    # Shut down gracefully when the host stops the process
+    try:
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGTERM, lambda: asyncio.create_task(bot.close())
+        )
+    except NotImplementedError:  # Not available on Windows
+        pass
+
     # Start the bot
-    await bot.start(os.getenv("BOT_TOKEN"))
+    try:
+        await bot.start(os.getenv("BOT_TOKEN"))
+    finally:
+        save_snapshot()
+        shutdown_scrape_pool()
+        await token_backend.close()
+
+
+if __name__ == "__main__":
+    # Trace allocations from the start when profiling memory (TRACEMALLOC_FRAMES)
+    from bot.utils.memory import start_tracing
 
+    start_tracing()
 
-# Start the FastAPI server in a separate thread
-fastapi_thread = threading.Thread(target=run_fastapi)
-fastapi_thread.daemon = (
-    True  # Daemonize the thread so it exits when the main program exits
-)
-fastapi_thread.start()
+    # Start the FastAPI server in a separate thread (the shard supervisor runs its own)
+    if os.getenv("RUN_HTTP_SERVER", "1") == "1":
+        fastapi_thread = threading.Thread(target=run_fastapi)
+        fastapi_thread.daemon = (
+            True  # Daemonize the thread so it exits when the main program exits
+        )
+        fastapi_thread.start()
 
-# Run the bot
-asyncio.run(main())
+    # Run the bot
+    asyncio.run(main())
@@ -0,0 +1,247 @@
+import os
+import time
+import logging
+import aiohttp
+import discord
+from discord import app_commands
+from discord.ext import commands
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Request
+from nacl.exceptions import BadSignatureError
+from nacl.signing import VerifyKey
+
+logger = logging.getLogger(__name__)
+
+DISCORD_API = "https://discord.com/api/v10"
+DISCORD_PUBLIC_KEY = os.getenv("DISCORD_PUBLIC_KEY")
+# Signed requests older (or further in the future) than this are rejected as replays
+MAX_TIMESTAMP_AGE_SECONDS = 300
+
+# Interaction and response types (https://discord.com/developers/docs/interactions/receiving-and-responding)
+PING = 1
+APPLICATION_COMMAND = 2
+PONG = 1
+CHANNEL_MESSAGE = 4
+DEFERRED_CHANNEL_MESSAGE = 5
+EPHEMERAL_FLAG = 1 << 6
+
+router = APIRouter()
+
+_verify_key = None
+_commands = None
+_session = None
+
+
+# Check the Ed25519 signature Discord puts on every interaction request
+def verify_signature(body: bytes, signature: str, timestamp: str) -> bool:
+    global _verify_key
+    if not DISCORD_PUBLIC_KEY or not signature or not timestamp:
+        return False
+    try:
+        if abs(time.time() - int(timestamp)) > MAX_TIMESTAMP_AGE_SECONDS:
+            return False
+    except ValueError:
+        return False
+    if _verify_key is None:
+        _verify_key = VerifyKey(bytes.fromhex(DISCORD_PUBLIC_KEY))
+    try:
+        _verify_key.verify(timestamp.encode() + body, bytes.fromhex(signature))
+        return True
+    except (BadSignatureError, ValueError):
+        return False
+
+
+# Load the cogs into a bot that never connects, to reuse their slash command handlers
+async def load_command_handlers() -> dict:
+    global _commands
+    if _commands is None:
+        from bot.bot import EXTENSIONS
+
+        client = commands.Bot(command_prefix="$", intents=discord.Intents.default())
+        for extension in EXTENSIONS:
+            await client.load_extension(extension)
+        _commands = {command.name: command for command in client.tree.get_commands()}
+    return _commands
+
+
+def _get_session() -> aiohttp.ClientSession:
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10))
+    return _session
+
+
+# Build a webhook message payload from discord.py style send() arguments
+def _message_payload(content=None, embed=None, embeds=None, ephemeral=False, **kwargs):
+    payload = {"content": content}
+    if embed is not None:
+        embeds = [embed]
+    if embeds is not None:
+        payload["embeds"] = [embed.to_dict() for embed in embeds]
+    if ephemeral:
+        payload["flags"] = EPHEMERAL_FLAG
+    # Views need a gateway connection to receive clicks; commands check
+    # interaction.supports_views and send pages as separate messages instead
+    if kwargs.get("view") is not None:
+        logger.warning("Dropping a view from a webhook message")
+    return payload
+
+
+class HttpUser:
+    def __init__(self, data: dict):
+        self.id = int(data["id"])
+        self.name = data.get("username", "")
+
+
+# A message sent through the interaction webhook
+class HttpMessage:
+    def __init__(self, interaction, data: dict):
+        self._interaction = interaction
+        self.id = data.get("id", "@original")
+
+    async def edit(self, **kwargs):
+        if set(kwargs) <= {"view"}:
+            return
+        await self._interaction.webhook_request(
+            "PATCH", f"/messages/{self.id}", _message_payload(**kwargs)
+        )
+
+
+# The interaction was already deferred by the endpoint's HTTP response
+class HttpResponse:
+    def __init__(self, interaction):
+        self._interaction = interaction
+
+    def is_done(self) -> bool:
+        return True
+
+    async def defer(self, **kwargs):
+        pass
+
+    async def send_message(self, content=None, **kwargs):
+        await self._interaction.followup.send(content, **kwargs)
+
+    async def edit_message(self, **kwargs):
+        await HttpMessage(self._interaction, {}).edit(**kwargs)
+
+
+class HttpFollowup:
+    def __init__(self, interaction):
+        self._interaction = interaction
+
+    async def send(self, content=None, wait=False, ephemeral=False, **kwargs):
+        interaction = self._interaction
+        # The first follow-up fills in the deferred (public) reply and keeps its
+        # visibility; to answer privately, drop the deferred reply first
+        if ephemeral and not interaction.replied:
+            await interaction.webhook_request("DELETE", "/messages/@original", None)
+        interaction.replied = True
+        data = await interaction.webhook_request(
+            "POST",
+            "?wait=true",
+            _message_payload(content, ephemeral=ephemeral, **kwargs),
+        )
+        return HttpMessage(interaction, data or {})
+
+
+# Enough of discord.Interaction for the cog commands, backed by webhook calls
+class HttpInteraction:
+    # Button clicks arrive over the gateway, which this endpoint does not have
+    supports_views = False
+
+    def __init__(self, payload: dict):
+        self.id = int(payload["id"])
+        self.application_id = payload["application_id"]
+        self.token = payload["token"]
+        self.data = payload.get("data", {})
+        self.guild_id = payload.get("guild_id")
+        user = payload["member"]["user"] if "member" in payload else payload["user"]
+        self.user = HttpUser(user)
+        self.created_at = discord.utils.snowflake_time(self.id)
+        self.command = None
+        self.replied = False
+        self.response = HttpResponse(self)
+        self.followup = HttpFollowup(self)
+
+    async def webhook_request(self, method: str, path: str, payload: dict):
+        url = f"{DISCORD_API}/webhooks/{self.application_id}/{self.token}{path}"
+        async with _get_session().request(method, url, json=payload) as response:
+            if response.status >= 400:
+                logger.error(
+                    "Webhook %s %s failed: %s", method, path, await response.text()
+                )
+                return None
+            if response.content_type == "application/json":
+                return await response.json()
+            return None
+
+    async def original_response(self):
+        return HttpMessage(self, {})
+
+
+# Run a slash command's checks (e.g. cooldowns) before anything is sent, so a refusal
+# can be the (ephemeral) interaction response itself. Returns the refusal or None.
+# Cooldown buckets live in this process: with `--workers N` each worker keeps its own,
+# so a user can get up to N times the per-user rate across the workers.
+async def run_checks(command, interaction: HttpInteraction):
+    try:
+        for check in command.checks:
+            if not await discord.utils.maybe_coroutine(check, interaction):
+                raise app_commands.CheckFailure()
+    except app_commands.CommandOnCooldown as e:
+        return f"Slow down! Try again in {e.retry_after:.0f}s."
+    except app_commands.CheckFailure:
+        return "You can't use this command here."
+    return None
+
+
+def _ephemeral_message(content: str) -> dict:
+    return {
+        "type": CHANNEL_MESSAGE,
+        "data": {"content": content, "flags": EPHEMERAL_FLAG},
+    }
+
+
+# Run a slash command handler from a cog (its checks already passed)
+async def dispatch(command, interaction: HttpInteraction):
+    try:
+        options = {
+            option["name"]: option["value"]
+            for option in interaction.data.get("options", [])
+        }
+        await command.callback(command.binding, interaction, **options)
+    except Exception as e:
+        logger.error("Command %s failed: %s", command.name, e, exc_info=e)
+        await interaction.followup.send(
+            "Something went wrong. Please try again later.", ephemeral=True
+        )
+
+
+# Discord interactions endpoint: answer with a deferred reply and finish via webhook
+@router.post("/interactions")
+async def interactions(request: Request, background_tasks: BackgroundTasks):
+    body = await request.body()
+    if not verify_signature(
+        body,
+        request.headers.get("X-Signature-Ed25519"),
+        request.headers.get("X-Signature-Timestamp"),
+    ):
+        raise HTTPException(status_code=401, detail="Invalid request signature")
+
+    payload = await request.json()
+    if payload["type"] == PING:
+        return {"type": PONG}
+    if payload["type"] == APPLICATION_COMMAND:
+        name = payload.get("data", {}).get("name")
+        command = (await load_command_handlers()).get(name)
+        if command is None:
+            return _ephemeral_message(f"Unknown command: {name}")
+
+        interaction = HttpInteraction(payload)
+        interaction.command = command
+        refusal = await run_checks(command, interaction)
+        if refusal is not None:
+            return _ephemeral_message(refusal)
+
+        background_tasks.add_task(dispatch, command, interaction)
+        return {"type": DEFERRED_CHANNEL_MESSAGE}
+    raise HTTPException(status_code=400, detail="Unsupported interaction type")
@@ -1,8 +1,100 @@
-from fastapi import FastAPI
+import os
+import secrets
+from fastapi import FastAPI, Header, HTTPException
+from bot.tasks.scheduler import job_stats
+from bot.utils.admission import admission_stats
+from bot.utils.http_cache import http_cache_stats
+from bot.utils.memory import memory_report
+from bot.utils.scrape_pool import scrape_pool_stats
+from bot.utils.sharding import read_all_health, read_leader
+from server.interactions import router as interactions_router
+
+# Set in the shard supervisor, whose bot runs in child processes without HTTP servers
+SHARD_SUPERVISOR = os.getenv("SHARD_SUPERVISOR") == "1"
+# Number of shard processes the supervisor runs, so ones that never reported show as down
+SHARD_PROCESSES = int(os.getenv("SHARD_PROCESSES", "0")) or None
+# Token required (as "X-Debug-Token") by the /debug endpoints; unset disables them
+DEBUG_TOKEN = os.getenv("DEBUG_TOKEN")
+# Most allocation sites /debug/memory lists
+MAX_DEBUG_ALLOCATIONS = 50
 
 app = FastAPI()
 
+# Discord interactions endpoint. Point the application's "Interactions Endpoint URL"
+# at /interactions and scale with e.g. `uvicorn server.main:app --workers 4`; the
+# gateway process (main.py) is then only needed for background tasks. Command
+# cooldowns are kept per worker process, so with N workers a user may get up to N
+# times the per-user rate.
+app.include_router(interactions_router)
+
 
 @app.get("/")
 async def root():
     return {"message": "Yayy!! The bot is still alive"}
+
+
+# This process' metrics, or under the supervisor the ones each shard process last
+# published with its health report (at most 15s old)
+def process_metrics(name: str, local):
+    if not SHARD_SUPERVISOR:
+        return local()
+    return {
+        "processes": {
+            health["process_index"]: health.get("metrics", {}).get(name)
+            for health in read_all_health(SHARD_PROCESSES)
+        }
+    }
+
+
+# Upstream concurrency, queue depth and wait times per priority
+@app.get("/metrics/admission")
+async def admission_metrics():
+    return process_metrics("admission", admission_stats)
+
+
+# Health of every shard process (written by the bot processes every 15s)
+@app.get("/health/shards")
+async def shard_health():
+    return {"leader": read_leader(), "processes": read_all_health(SHARD_PROCESSES)}
+
+
+# Conditional request cache hits, misses and bytes saved
+@app.get("/metrics/http_cache")
+async def http_cache_metrics():
+    return process_metrics("http_cache", http_cache_stats)
+
+
+# Last/next run, failures and duration histograms of the background jobs
+@app.get("/metrics/jobs")
+async def jobs_metrics():
+    return job_stats()
+
+
+# Library scraping worker pool
+@app.get("/metrics/scrape_pool")
+async def scrape_pool_metrics():
+    return process_metrics("scrape_pool", scrape_pool_stats)
+
+
+def check_debug_token(token: str):
+    if not DEBUG_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not token or not secrets.compare_digest(token, DEBUG_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid debug token")
+
+
+# RSS, top allocation sites (with TRACEMALLOC_FRAMES set) and cache sizes. A plain
+# def: FastAPI runs it in its threadpool, so a tracemalloc snapshot does not block
+# the event loop.
+@app.get("/debug/memory")
+def debug_memory(
+    limit: int = 10,
+    group_by: str = "lineno",
+    x_debug_token: str = Header(default=None),
+):
+    check_debug_token(x_debug_token)
+    limit = max(0, min(limit, MAX_DEBUG_ALLOCATIONS))
+    if group_by not in ("lineno", "filename", "traceback"):
+        return {"error": "group_by must be lineno, filename or traceback."}
+    # Allocation sites are only available from the process itself
+    return process_metrics("memory", lambda: memory_report(limit, group_by))
@@ -0,0 +1,67 @@
+import asyncio
+import threading
+from bot.utils.admission import Priority, UpstreamLane
+
+
+def test_waiters_are_served_by_priority_then_fifo():
+    order = []
+
+    async def call(lane, name, priority):
+        async with lane.slot(priority):
+            order.append(name)
+            await asyncio.sleep(0)
+
+    async def scenario():
+        lane = UpstreamLane("test", 1)
+        await lane.acquire(Priority.INTERACTIVE)
+        tasks = [
+            asyncio.create_task(call(lane, "sweep 1", Priority.BACKGROUND)),
+            asyncio.create_task(call(lane, "sweep 2", Priority.BACKGROUND)),
+            asyncio.create_task(call(lane, "command 1", Priority.INTERACTIVE)),
+            asyncio.create_task(call(lane, "command 2", Priority.INTERACTIVE)),
+        ]
+        await asyncio.sleep(0)
+        assert lane.queued(Priority.BACKGROUND) == 2
+        lane.release()
+        await asyncio.gather(*tasks)
+        return lane
+
+    lane = asyncio.run(scenario())
+    assert order == ["command 1", "command 2", "sweep 1", "sweep 2"]
+    assert lane.in_use == 0
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def scenario():
+        lane = UpstreamLane("test", 1)
+        await lane.acquire(Priority.INTERACTIVE)
+        waiter = asyncio.create_task(lane.acquire(Priority.INTERACTIVE))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        lane.release()
+        return lane
+
+    assert asyncio.run(scenario()).in_use == 0
+
+
+def test_slot_is_handed_to_a_waiter_on_another_loop():
+    lane = UpstreamLane("test", 1)
+    results = []
+
+    async def waiter():
+        async with lane.slot(Priority.INTERACTIVE):
+            results.append("acquired")
+
+    async def holder():
+        await lane.acquire(Priority.BACKGROUND)
+        thread = threading.Thread(target=asyncio.run, args=(waiter(),))
+        thread.start()
+        while lane.queued(Priority.INTERACTIVE) == 0:
+            await asyncio.sleep(0.01)
+        lane.release()
+        await asyncio.to_thread(thread.join, 5)
+
+    asyncio.run(holder())
+    assert results == ["acquired"]
+    assert lane.in_use == 0
@@ -0,0 +1,53 @@
+import asyncio
+import sqlite3
+import time
+from bot.utils import dashboard
+from bot.utils.dashboard import DashboardStore
+
+
+def test_processes_share_views(tmp_path):
+    path = str(tmp_path / "dashboards.sqlite3")
+    leader, worker = DashboardStore(path), DashboardStore(path)
+
+    leader.update("1", lambda view: {"books": ("a book",)})
+    worker.mark_viewed("1")
+
+    assert worker.get("1")["books"] == ("a book",)
+    assert [user_id for user_id, _ in leader.viewed_since(time.time() - 60)] == ["1"]
+
+
+def test_updates_keep_the_rest_of_the_view(tmp_path):
+    store = DashboardStore(str(tmp_path / "dashboards.sqlite3"))
+    store.update("1", lambda view: {"books": ()})
+    store.mark_viewed("1")
+    view = store.update("1", lambda view: {"auth_status": dashboard.AUTHORIZED})
+
+    assert view["books"] == ()
+    assert view["last_viewed_at"] is not None
+    assert store.get("2") is None
+
+
+def test_expired_views_are_dropped(tmp_path, monkeypatch):
+    store = DashboardStore(str(tmp_path / "dashboards.sqlite3"))
+    store.update("1", lambda view: {})
+    store.mark_viewed("1")
+    monkeypatch.setattr(dashboard, "DASHBOARD_TTL", -1)
+
+    assert store.get("1") is None
+    assert store.viewed_since(0) == []
+    assert len(store) == 0
+
+
+def test_locked_store_does_not_fail_the_command(tmp_path, monkeypatch, caplog):
+    path = str(tmp_path / "dashboards.sqlite3")
+    monkeypatch.setattr(dashboard, "DASHBOARD_BUSY_TIMEOUT", 0.05)
+    monkeypatch.setattr(dashboard, "_dashboard_store", DashboardStore(path))
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+
+    asyncio.run(dashboard.update_books("1", "ada", ["a book"]))
+    assert "Failed to update a dashboard" in caplog.text
+
+    other.execute("ROLLBACK")
+    asyncio.run(dashboard.update_books("1", "ada", ["a book"]))
+    assert asyncio.run(dashboard.get_view("1"))["books"] == ("a book",)
@@ -0,0 +1,65 @@
+import os
+import pytest
+from bot.utils.hot_reload import ROOT_DIR, path_to_module, plan_reload
+
+EXTENSIONS = {"bot.commands.greet", "bot.commands.library"}
+
+
+def test_path_to_module():
+    path = os.path.join(ROOT_DIR, "bot", "commands", "greet.py")
+    assert path_to_module(path) == "bot.commands.greet"
+    assert path_to_module(os.path.join(ROOT_DIR, "bot", "__init__.py")) == "bot"
+    assert path_to_module(os.path.join(ROOT_DIR, "README.md")) is None
+
+
+def test_changed_cog_is_reloaded():
+    assert plan_reload({"bot.commands.greet"}, EXTENSIONS) == (
+        False,
+        [],
+        ["bot.commands.greet"],
+    )
+
+
+def test_stateless_helper_reloads_every_cog():
+    assert plan_reload({"bot.utils.rendering"}, EXTENSIONS) == (
+        False,
+        ["bot.utils.rendering"],
+        sorted(EXTENSIONS),
+    )
+
+
+def test_core_and_stateful_modules_restart():
+    for module in ("main", "bot.bot", "bot.tasks.scheduler", "bot.utils.admission"):
+        restart, _, _ = plan_reload({module}, EXTENSIONS)
+        assert restart, module
+
+
+# Imported by modules that are never reloaded, so only a restart applies an edit
+def test_helpers_used_outside_the_cogs_restart():
+    for module in (
+        "bot.utils.command_sync",
+        "bot.utils.metrics",
+        "bot.utils.models",
+        "bot.utils.state",
+    ):
+        restart, _, _ = plan_reload({module}, EXTENSIONS)
+        assert restart, module
+
+
+def test_edited_helper_restarts_instead_of_reloading(monkeypatch):
+    import asyncio
+    from watchfiles import Change
+    from bot.utils import hot_reload
+
+    restarts = []
+    monkeypatch.setattr(hot_reload, "restart_process", lambda: restarts.append(1))
+    monkeypatch.setattr(
+        hot_reload.importlib, "reload", lambda module: pytest.fail("reloaded")
+    )
+
+    class FakeBot:
+        extensions = dict.fromkeys(EXTENSIONS)
+
+    path = os.path.join(ROOT_DIR, "bot", "utils", "models.py")
+    asyncio.run(hot_reload.reload_changes(FakeBot(), {(Change.modified, path)}))
+    assert restarts == [1]
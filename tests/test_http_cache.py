@@ -0,0 +1,35 @@
+import sqlite3
+from bot.utils import http_cache
+from bot.utils.http_cache import CacheEntry, HttpCache
+
+URL = "https://library.example/Book/BookIssue"
+
+
+def test_locked_database_is_a_miss(tmp_path, monkeypatch):
+    path = str(tmp_path / "http_cache.sqlite3")
+    monkeypatch.setattr(http_cache, "HTTP_CACHE_BUSY_TIMEOUT", 0.05)
+    cache = HttpCache(path)
+    entry = CacheEntry("etag", None, "hash", 10, ["a book"])
+    cache.put("ada", URL, entry)
+
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN EXCLUSIVE")
+    cache.put("bob", URL, entry)  # Logged, not raised
+    assert cache.hit("ada", URL, entry, not_modified=True) == ["a book"]
+    other.execute("ROLLBACK")
+
+    assert cache.get("ada", URL).payload == ["a book"]
+    assert cache.get("bob", URL) is None
+
+
+def test_worker_counters_are_added_to_the_parent(monkeypatch):
+    monkeypatch.setattr(http_cache, "_stats", dict.fromkeys(http_cache._stats, 0))
+
+    def scrape():
+        http_cache._stats["misses"] += 2
+        return "books"
+
+    result, delta = http_cache.with_http_cache_stats(scrape)
+    assert result == "books" and delta["misses"] == 2
+    http_cache.add_http_cache_stats(delta)
+    assert http_cache._stats["misses"] == 4
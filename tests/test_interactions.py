@@ -0,0 +1,144 @@
+import json
+import time
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from nacl.signing import SigningKey
+from server import interactions
+from bot.utils import rendering
+
+SIGNING_KEY = SigningKey.generate()
+
+
+@pytest.fixture(autouse=True)
+def public_key(monkeypatch):
+    monkeypatch.setattr(
+        interactions, "DISCORD_PUBLIC_KEY", SIGNING_KEY.verify_key.encode().hex()
+    )
+    monkeypatch.setattr(interactions, "_verify_key", None)
+
+
+@pytest.fixture
+def webhook_calls(monkeypatch):
+    calls = []
+
+    async def webhook_request(self, method, path, payload):
+        calls.append((method, path, payload))
+        return {"id": str(len(calls))}
+
+    monkeypatch.setattr(
+        interactions.HttpInteraction, "webhook_request", webhook_request
+    )
+    return calls
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(interactions.router)
+    return TestClient(app)
+
+
+def sign(body: bytes, timestamp: str = None):
+    timestamp = timestamp or str(int(time.time()))
+    signature = SIGNING_KEY.sign(timestamp.encode() + body).signature.hex()
+    return signature, timestamp
+
+
+def post(client, payload: dict):
+    body = json.dumps(payload).encode()
+    signature, timestamp = sign(body)
+    return client.post(
+        "/interactions",
+        content=body,
+        headers={
+            "X-Signature-Ed25519": signature,
+            "X-Signature-Timestamp": timestamp,
+        },
+    )
+
+
+def command(name: str, user_id: str = "42", **options):
+    return {
+        "id": "1234567890123456789",
+        "application_id": "1",
+        "token": "token",
+        "type": interactions.APPLICATION_COMMAND,
+        "data": {
+            "name": name,
+            "options": [{"name": k, "value": v} for k, v in options.items()],
+        },
+        "user": {"id": user_id, "username": "ada"},
+    }
+
+
+def test_valid_signature():
+    signature, timestamp = sign(b"{}")
+    assert interactions.verify_signature(b"{}", signature, timestamp)
+
+
+def test_bad_signature():
+    signature, timestamp = sign(b"{}")
+    assert not interactions.verify_signature(b"{ }", signature, timestamp)
+    assert not interactions.verify_signature(b"{}", "zz", timestamp)
+
+
+def test_stale_or_missing_headers():
+    signature, timestamp = sign(b"{}", str(int(time.time()) - 3600))
+    assert not interactions.verify_signature(b"{}", signature, timestamp)
+    assert not interactions.verify_signature(b"{}", None, timestamp)
+    assert not interactions.verify_signature(b"{}", signature, None)
+    assert not interactions.verify_signature(b"{}", signature, "not a number")
+
+
+def test_unsigned_request_is_rejected(client):
+    response = client.post("/interactions", content=b"{}")
+    assert response.status_code == 401
+
+
+def test_ping(client):
+    response = post(client, {"type": interactions.PING})
+    assert response.json() == {"type": interactions.PONG}
+
+
+def test_command_is_deferred_then_answered(client, webhook_calls):
+    response = post(client, command("greet"))
+    assert response.json() == {"type": interactions.DEFERRED_CHANNEL_MESSAGE}
+    assert webhook_calls == [("POST", "?wait=true", {"content": "Hello, ada!"})]
+
+
+def test_unknown_command(client):
+    data = post(client, command("nope")).json()
+    assert data["type"] == interactions.CHANNEL_MESSAGE
+    assert data["data"]["flags"] == interactions.EPHEMERAL_FLAG
+
+
+def test_cooldown_is_an_ephemeral_response(client, webhook_calls):
+    for _ in range(5):
+        data = post(client, command("dashboard", user_id="7")).json()
+    assert data["type"] == interactions.CHANNEL_MESSAGE
+    assert data["data"]["content"].startswith("Slow down!")
+    assert data["data"]["flags"] == interactions.EPHEMERAL_FLAG
+
+
+def test_ephemeral_reply_replaces_the_public_deferral(client, webhook_calls):
+    # An empty dashboard is answered privately
+    post(client, command("dashboard", user_id="8"))
+    assert webhook_calls[0] == ("DELETE", "/messages/@original", None)
+    assert webhook_calls[1][2]["flags"] == interactions.EPHEMERAL_FLAG
+
+
+def test_pages_are_sent_as_messages(webhook_calls):
+    import asyncio
+
+    interaction = interactions.HttpInteraction(command("greet"))
+    asyncio.run(
+        rendering.send_paginated(
+            interaction, range(100), str, title="Items", empty_message="None"
+        )
+    )
+    embeds = [
+        payload["embeds"] for _, _, payload in webhook_calls if "embeds" in payload
+    ]
+    assert len(embeds) == rendering.MAX_UNPAGED_PAGES
+    assert "first" in webhook_calls[-1][2]["content"]
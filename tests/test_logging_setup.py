@@ -0,0 +1,18 @@
+import logging
+from bot.utils.logging_setup import _LazyQueueHandler
+
+
+def test_args_are_merged_when_the_record_is_queued():
+    queued = []
+    handler = _LazyQueueHandler(None)
+    handler.enqueue = queued.append
+
+    books = ["a"]
+    record = logging.LogRecord(
+        "test", logging.INFO, __file__, 1, "Books: %s", (books,), None
+    )
+    handler.handle(record)
+    books.append("b")  # The caller keeps changing its object
+
+    assert queued[0].getMessage() == "Books: ['a']"
+    assert queued[0].args is None
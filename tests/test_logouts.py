@@ -0,0 +1,27 @@
+import pytest
+from bot.utils import classroom_api, logouts, state
+
+
+@pytest.fixture(autouse=True)
+def logout_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(state, "STATE_DIR", str(tmp_path))
+    monkeypatch.setattr(logouts, "_logout_store", None)
+    monkeypatch.setattr(classroom_api.courses_cache, "_entries", {})
+    monkeypatch.setattr(classroom_api.courses_cache, "_restored", True)
+
+
+def test_cached_courses_need_credentials():
+    classroom_api.courses_cache.set("1", (0.0, [{"id": "c"}]))
+    assert classroom_api.list_classrooms("1", object()) == [{"id": "c"}]
+    assert "error" in classroom_api.list_classrooms("1", {"auth_url": "https://x"})
+    assert "error" in classroom_api.list_classrooms("1", {"error": "expired"})
+    assert "error" in classroom_api.list_classrooms("1", None)
+
+
+def test_logout_in_another_process_drops_cached_courses():
+    classroom_api.courses_cache.set("1", (0.0, [{"id": "c"}]))
+    logouts.record_logout("1")
+    assert logouts.logged_out_since("1", 0.0)
+    assert not logouts.logged_out_since("2", 0.0)
+    # A fresh fetch is attempted (and fails here without a Classroom service)
+    assert "error" in classroom_api.list_classrooms("1", object())
@@ -0,0 +1,15 @@
+from bot.utils.metrics import percentile
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile(values, 100) == 100
+
+
+def test_percentile_of_few_samples():
+    assert percentile([1, 2, 3, 4, 5, 6], 50) == 3
+    assert percentile(list(range(1, 11)), 50) == 5
+    assert percentile([7], 99) == 7
+    assert percentile([], 50) == 0.0
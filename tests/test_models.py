@@ -0,0 +1,46 @@
+import datetime
+from bot.utils.models import BookIssue, ClassroomItem, parse_library_date
+
+
+def test_book_issue_from_row():
+    book = BookIssue.from_row(
+        {
+            "Accession No.": "A123",
+            "Title": "Operating Systems",
+            "Issue Date": "2025-01-01",
+            "Return Date": "01/15/2025",
+            "Over Due": "-3 Days",
+        }
+    )
+    assert book.accession_no == "A123"
+    assert book.issue_date == datetime.date(2025, 1, 1)
+    assert book.return_date == datetime.date(2025, 1, 15)
+    assert book.days_until_due == 3
+
+
+def test_book_issue_without_over_due_uses_the_return_date():
+    book = BookIssue.from_row(
+        {"Title": "Compilers", "Return Date": "2025-01-15"},
+        today=datetime.date(2025, 1, 10),
+    )
+    assert book.days_until_due == 5
+    assert book.issue_date is None
+
+
+def test_unparseable_dates_are_none():
+    assert parse_library_date("") is None
+    assert parse_library_date("not a date") is None
+
+
+def test_classroom_item_from_api():
+    item = ClassroomItem.from_api(
+        "announcement",
+        {
+            "id": "1",
+            "courseId": "1000",
+            "text": "Exam on Friday",
+            "updateTime": "2025-01-10T08:30:00.123Z",
+        },
+    )
+    assert item.text == "Exam on Friday"
+    assert item.update_time.tzinfo is not None
@@ -0,0 +1,43 @@
+from bot.utils import rendering
+from bot.utils.rendering import PageSource
+
+
+def render(item):
+    return f"item {item}"
+
+
+def test_pages_hold_at_most_max_items():
+    source = PageSource(range(12), render, "Title")
+    assert source.get_page(0).count("item") == rendering.MAX_ITEMS_PER_PAGE
+    assert source.get_page(2) == "item 10\n\nitem 11"
+    assert source.get_page(3) is None
+    assert source.is_complete
+    assert len(source.pages) == 3
+
+
+def test_only_the_requested_page_is_rendered():
+    rendered = []
+    source = PageSource(range(100), lambda i: rendered.append(i) or str(i), "Title")
+    source.get_page(0)
+    assert source.has_page(1)
+    # The first page plus the item peeked to know that a next page exists
+    assert len(rendered) == rendering.MAX_ITEMS_PER_PAGE + 1
+
+
+def test_has_page_at_the_end():
+    source = PageSource(range(rendering.MAX_ITEMS_PER_PAGE), render, "Title")
+    source.get_page(0)
+    assert not source.has_page(1)
+
+
+def test_long_items_are_split_by_the_char_budget():
+    source = PageSource(["a" * 2000, "b" * 2000], str, "Title")
+    assert source.get_page(0) == "a" * 2000
+    assert source.get_page(1) == "b" * 2000
+
+
+def test_embed_title_is_truncated():
+    source = PageSource(range(3), render, "x" * 300)
+    embed = source.embed(0)
+    assert len(embed.title) == rendering.EMBED_TITLE_LIMIT
+    assert embed.footer.text == "Page 1 of 1"
@@ -0,0 +1,59 @@
+import json
+import datetime
+from bot.tasks import scheduler
+from bot.tasks.scheduler import Adaptive, Daily, Interval, Scheduler
+from bot.utils import state
+
+
+def timestamp(*args) -> float:
+    return datetime.datetime(*args).timestamp()
+
+
+def test_daily_runs_later_the_same_day():
+    after = timestamp(2025, 1, 6, 7, 0)  # A Monday
+    assert Daily(at="08:00").next_run(after, {}) == timestamp(2025, 1, 6, 8, 0)
+
+
+def test_daily_runs_the_next_day_once_the_time_passed():
+    after = timestamp(2025, 1, 6, 8, 0)
+    assert Daily(at="08:00").next_run(after, {}) == timestamp(2025, 1, 7, 8, 0)
+
+
+def test_daily_skips_to_the_allowed_weekdays():
+    after = timestamp(2025, 1, 10, 9, 0)  # A Friday
+    schedule = Daily(at="08:00", weekdays=(0,))
+    assert schedule.next_run(after, {}) == timestamp(2025, 1, 13, 8, 0)
+
+
+def test_interval():
+    assert Interval(60).next_run(100.0, {}) == 160.0
+
+
+def test_adaptive_backs_off_and_speeds_up():
+    schedule = Adaptive(min_seconds=60, max_seconds=240)
+    state = {}
+    for _ in range(3):
+        schedule.adapt(state, found_work=False)
+    assert state["interval"] == 240
+    schedule.adapt(state, found_work=True)
+    assert schedule.next_run(0.0, state) == 120
+
+
+def test_job_stats_without_a_histogram(tmp_path, monkeypatch):
+    monkeypatch.setattr(state, "STATE_DIR", str(tmp_path))
+    (tmp_path / scheduler.JOBS_STATE_FILE).write_text(
+        json.dumps({"old_job": {"next_run": 0}})
+    )
+    stats = scheduler.job_stats()["old_job"]
+    assert stats["histogram"]["count"] == 0
+    assert sum(stats["histogram"]["buckets"].values()) == 0
+
+
+def test_lock_file_errors_wait_for_the_next_tick(monkeypatch):
+    def acquire():
+        raise PermissionError("read-only state directory")
+
+    monkeypatch.setattr(scheduler, "is_leader", lambda: True)
+    instance = Scheduler({})
+    monkeypatch.setattr(instance.lock, "acquire", acquire)
+    assert instance._may_run() is False
@@ -0,0 +1,13 @@
+from bot.utils.search_index import build_match_query
+
+
+def test_terms_are_quoted_and_the_last_is_a_prefix():
+    assert build_match_query("exam friday") == '"exam" "friday"*'
+
+
+def test_quotes_are_escaped():
+    assert build_match_query('say "hi"') == '"say" """hi"""*'
+
+
+def test_empty_query():
+    assert build_match_query("   ") is None
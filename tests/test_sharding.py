@@ -0,0 +1,18 @@
+import json
+from bot.utils import sharding, state
+
+
+def test_processes_without_a_report_are_down(tmp_path, monkeypatch):
+    monkeypatch.setattr(state, "STATE_DIR", str(tmp_path))
+    monkeypatch.setattr(sharding, "STATE_DIR", str(tmp_path))
+    (tmp_path / "shard-health-1.json").write_text(
+        json.dumps({"process_index": 1, "ready": True})
+    )
+
+    reports = sharding.read_all_health(3)
+    assert [report["process_index"] for report in reports] == [0, 1, 2]
+    assert [report["ready"] for report in reports] == [False, True, False]
+    assert reports[0]["down"] and reports[2]["down"]
+
+    # Without a process count, every report on disk
+    assert sharding.read_all_health() == [{"process_index": 1, "ready": True}]
@@ -0,0 +1,39 @@
+import os
+import stat
+import pytest
+from bot.utils import snapshot, state
+
+
+def test_secret_caches_are_not_saved(tmp_path, monkeypatch):
+    monkeypatch.setattr(state, "STATE_DIR", str(tmp_path))
+    monkeypatch.setattr(snapshot, "STATE_DIR", str(tmp_path))
+    monkeypatch.setattr(snapshot, "_caches", {})
+    monkeypatch.setattr(snapshot, "_pending", {})
+
+    kept = snapshot.register_cache("kept", ttl=60)
+    secret = snapshot.register_cache("secret", ttl=60, persist=False)
+    kept.set("a", 1)
+    secret.set("b", "token")
+    snapshot.save_snapshot()
+
+    path = tmp_path / snapshot.SNAPSHOT_FILE
+    if hasattr(os, "getuid"):
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert [p.name for p in tmp_path.iterdir()] == [snapshot.SNAPSHOT_FILE]
+
+    monkeypatch.setattr(snapshot, "_caches", {})
+    assert snapshot.load_snapshot()
+    assert snapshot.register_cache("kept", ttl=60).get("a") == 1
+    assert snapshot.register_cache("secret", ttl=60, persist=False).get("b") is None
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX permissions")
+def test_snapshot_writable_by_others_is_ignored(tmp_path, monkeypatch):
+    monkeypatch.setattr(state, "STATE_DIR", str(tmp_path))
+    monkeypatch.setattr(snapshot, "STATE_DIR", str(tmp_path))
+    monkeypatch.setattr(snapshot, "_caches", {})
+    monkeypatch.setattr(snapshot, "_pending", {})
+
+    snapshot.save_snapshot()
+    os.chmod(tmp_path / snapshot.SNAPSHOT_FILE, 0o666)
+    assert not snapshot.load_snapshot()
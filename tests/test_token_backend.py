@@ -0,0 +1,81 @@
+import json
+import socket
+import asyncio
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from bot.utils import google_auth, token_backend
+from bot.utils.token_backend import TokenBackend
+
+TOKEN = {"token": "access", "refresh_token": "refresh", "client_id": "id"}
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = TokenBackend()
+    monkeypatch.setattr(google_auth, "token_backend", backend)
+    monkeypatch.setattr(google_auth.token_cache, "_entries", {})
+    monkeypatch.setattr(google_auth.token_cache, "_restored", True)
+    return backend
+
+
+# Run `test(url)` against a stub backend answering GET /classroom/check/ with `check`
+def with_backend(monkeypatch, check, test):
+    async def run():
+        app = web.Application()
+        app.router.add_get("/classroom/check/", check)
+        server = TestServer(app)
+        await server.start_server()
+        monkeypatch.setattr(token_backend, "BACKEND_URL", str(server.make_url("")))
+        try:
+            return await test()
+        finally:
+            await google_auth.token_backend.close()
+            await server.close()
+
+    return asyncio.run(run())
+
+
+def test_concurrent_checks_share_one_request(monkeypatch, backend):
+    requests = []
+
+    async def check(request):
+        requests.append(request.query["clientid"])
+        await asyncio.sleep(0.05)
+        return web.json_response({"token": json.dumps(TOKEN)})
+
+    async def test():
+        return await asyncio.gather(*(backend.check("1") for _ in range(10)))
+
+    results = with_backend(monkeypatch, check, test)
+    assert requests == ["1"]
+    assert results == [TOKEN] * 10
+
+
+def test_timeout_returns_the_error_creds(monkeypatch, backend):
+    monkeypatch.setattr(token_backend, "BACKEND_TIMEOUT", 0.1)
+
+    async def check(request):
+        await asyncio.sleep(1)
+        return web.json_response({"token": json.dumps(TOKEN)})
+
+    creds = with_backend(monkeypatch, check, lambda: google_auth.get_credentials("2"))
+    assert "backend did not respond" in creds["error"]
+    # Not cached: the next command asks the backend again
+    assert google_auth.token_cache.get("2") is None
+
+
+def test_unsubscribe_survives_a_connection_error(monkeypatch, backend):
+    # A port nothing listens on
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    monkeypatch.setattr(token_backend, "BACKEND_URL", f"http://127.0.0.1:{port}")
+
+    async def test():
+        try:
+            return await backend.unsubscribe("3")
+        finally:
+            await backend.close()
+
+    assert "did not respond" in asyncio.run(test())["error"]